@@ -0,0 +1,194 @@
+"""Time-to-first-response benchmark for bot restarts.
+
+Starts `src/bot.py --polling --profile-startup` as a fresh process against
+local stand-ins for TheCocktailDB and the Bot API, with a /start update
+waiting in the queue, and measures the time from spawning the process to
+the bot's first sendMessage. Every run is a new interpreter, so imports,
+settings, the application build, cache and snapshot loading and the first
+getUpdates are all included, as after a deploy.
+
+The first run builds the local data files (catalog image, caches) and is
+reported separately; later runs restart on top of them:
+
+    python benchmarks/cold_start.py --runs 10 --output cold_start.json
+    python benchmarks/cold_start.py --baseline cold_start.json --tolerance 0.2
+
+The per-phase breakdown logged by --profile-startup is collected from each
+run and reported as medians.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import statistics
+import sys
+import tempfile
+import time
+
+from load_test import (
+    API_PREFIX, BOT_TOKEN, SRC_DIR, FakeBotAPI, FakeCocktailDB, SimulatedUser, synthetic_catalog
+)
+
+BOT_SCRIPT = os.path.join(SRC_DIR, 'bot.py')
+
+# "  phase name     12.3 ms" lines following "Startup profile:"
+_PHASE_LINE = re.compile(r'^  (.+?)\s+(-?[\d.]+) ms$')
+
+class PollingBotAPI(FakeBotAPI):
+    """Bot API stand-in that also serves getUpdates from a queue and reports the first reply."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.pending = []
+        self.first_reply = None
+        self.server.add_route('POST', f"/bot{BOT_TOKEN}/getUpdates", self._get_updates)
+
+    def reset(self, updates):
+        self.pending = list(updates)
+        self.first_reply = asyncio.get_running_loop().create_future()
+
+    async def _get_updates(self, request):
+        from services.http_server import HttpResponse
+        updates, self.pending = self.pending, []
+        if not updates:
+            # Stand in for a long poll without making the bot wait on shutdown
+            await asyncio.sleep(0.1)
+        return HttpResponse(200, json.dumps({'ok': True, 'result': updates}), 'application/json')
+
+    async def _handle(self, request):
+        if request.path.endswith('/sendMessage') and self.first_reply and not self.first_reply.done():
+            self.first_reply.set_result(time.perf_counter())
+        return await super()._handle(request)
+
+def parse_profile(output: str):
+    """Return {phase: ms} from the startup profile logged by the bot."""
+    phases = {}
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.endswith('Startup profile:'):
+            for phase_line in lines[i + 1:]:
+                match = _PHASE_LINE.match(phase_line)
+                if not match:
+                    break
+                phases[match.group(1)] = float(match.group(2))
+            break
+    return phases
+
+async def run_once(bot_api, env, timeout):
+    """Start the bot, wait for its reply to /start and stop it; return (seconds, phases)."""
+    bot_api.reset([SimulatedUser(1).message('/start')])
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, BOT_SCRIPT, '--polling', '--profile-startup',
+        env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+    )
+    output = asyncio.ensure_future(process.stderr.read())
+    try:
+        replied = await asyncio.wait_for(asyncio.shield(bot_api.first_reply), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise SystemExit(f"No reply within {timeout}s:\n{(await output).decode(errors='replace')}")
+    process.send_signal(signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+    return replied - started, parse_profile((await output).decode(errors='replace'))
+
+async def run_benchmark(args, env, drinks):
+    cocktail_db = FakeCocktailDB(drinks, latency=args.upstream_latency)
+    bot_api = PollingBotAPI(latency=args.bot_latency)
+    await cocktail_db.server.start('127.0.0.1', args.upstream_port)
+    await bot_api.server.start('127.0.0.1', args.bot_port)
+    try:
+        first, first_phases = await run_once(bot_api, env, args.timeout)
+        restarts = []
+        phases = {}
+        for _ in range(args.runs):
+            seconds, run_phases = await run_once(bot_api, env, args.timeout)
+            restarts.append(seconds)
+            for phase, ms in run_phases.items():
+                phases.setdefault(phase, []).append(ms)
+    finally:
+        await bot_api.server.stop()
+        await cocktail_db.server.stop()
+    return {
+        'runs': args.runs,
+        'drinks': len(drinks),
+        'snapshot_mode': args.snapshot_mode,
+        'first_start_ms': first * 1000,
+        'first_start_phases_ms': first_phases,
+        'restart_p50_ms': statistics.median(restarts) * 1000,
+        'restart_max_ms': max(restarts) * 1000,
+        'restart_min_ms': min(restarts) * 1000,
+        'phases_p50_ms': {phase: statistics.median(values) for phase, values in phases.items()},
+    }
+
+def print_report(results):
+    print(f"first start: {results['first_start_ms']:.0f} ms  "
+          f"restart: p50 {results['restart_p50_ms']:.0f} ms, min {results['restart_min_ms']:.0f} ms, "
+          f"max {results['restart_max_ms']:.0f} ms ({results['runs']} runs)")
+    if results['phases_p50_ms']:
+        width = max(len(phase) for phase in results['phases_p50_ms'])
+        print(f"{'phase (restart p50)':<{width}}  {'ms':>8}")
+        for phase, ms in results['phases_p50_ms'].items():
+            print(f"{phase:<{width}}  {ms:>8.1f}")
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return human-readable regressions against a previous run."""
+    regressions = []
+    for key, label in (('restart_p50_ms', 'restart p50'), ('first_start_ms', 'first start')):
+        previous = baseline.get(key)
+        if previous and results[key] > previous * (1 + tolerance):
+            regressions.append(f"{label} {results[key]:.0f}ms > baseline {previous:.0f}ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Restarts to measure after the first start")
+    parser.add_argument('--drinks', type=int, default=400, help="Size of the synthetic catalog")
+    parser.add_argument('--snapshot-mode', action='store_true', help="Load a local catalog snapshot at startup")
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help="Fake TheCocktailDB latency (s)")
+    parser.add_argument('--bot-latency', type=float, default=0.02, help="Fake Bot API latency (s)")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds to wait for a reply")
+    parser.add_argument('--upstream-port', type=int, default=18083)
+    parser.add_argument('--bot-port', type=int, default=18084)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="Fail if results regress against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression vs. baseline")
+    args = parser.parse_args(argv)
+
+    drinks = synthetic_catalog(args.drinks)
+    workdir = tempfile.mkdtemp(prefix='cocktail-cold-start-')
+    env = dict(
+        os.environ,
+        BOT_TOKEN=BOT_TOKEN,
+        API_URL=f"http://127.0.0.1:{args.bot_port}",
+        COCKTAIL_DB_URL=f"http://127.0.0.1:{args.upstream_port}{API_PREFIX}",
+        DATA_DB_PATH=os.path.join(workdir, 'bot.sqlite3'),
+        CATALOG_MODE='snapshot' if args.snapshot_mode else 'upstream',
+        PYTHONUNBUFFERED='1',
+    )
+    if args.snapshot_mode:
+        from services.catalog import save_snapshot
+        save_snapshot(env['DATA_DB_PATH'], drinks)
+
+    results = asyncio.run(run_benchmark(args, env, drinks))
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
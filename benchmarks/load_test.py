@@ -0,0 +1,488 @@
+"""End-to-end load and latency benchmark with local stand-ins.
+
+Starts a fake TheCocktailDB and a fake Telegram Bot API on localhost (in a
+separate process so they don't compete with the bot for CPU), builds
+the real application from src/bot.py against them and drives the real
+handlers with simulated users doing mixed flows:
+
+    search      menu button -> cocktail name -> result cards
+    letter      menu button -> first letter -> name list
+    ingredient  menu button -> ingredient -> album of drinks
+    random      /random
+
+It reports p50/p95/p99 latency per flow, updates/sec and upstream calls per
+update, and can write the results as JSON and compare them with a baseline
+so regressions fail a CI job:
+
+    python benchmarks/load_test.py --users 2000 --output results.json
+    python benchmarks/load_test.py --baseline results.json --tolerance 0.2
+
+Upstream data is synthetic unless --catalog points at a snapshot written by
+`bot.py warm-catalog`, which replays the recorded TheCocktailDB records.
+Telegram rate limits are lifted so the bot itself is measured; pass
+--telegram-limits to keep them.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qs
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+BOT_TOKEN = '123456:LOADTEST'
+API_PREFIX = '/api/json/v1/1'
+FLOWS = ('search', 'letter', 'ingredient', 'random')
+
+SYNTHETIC_NAMES = (
+    "Margarita", "Mojito", "Mai Tai", "Martini", "Manhattan", "Gin Fizz", "Gin Tonic",
+    "Bloody Mary", "Blue Lagoon", "Black Russian", "White Russian", "Cosmopolitan",
+    "Daiquiri", "Negroni", "Old Fashioned", "Pina Colada", "Tom Collins", "Sidecar",
+    "Zombie", "Espresso Martini", "Long Island Iced Tea", "Whiskey Sour", "Caipirinha",
+    "Mint Julep", "Sex on the Beach", "Tequila Sunrise", "Kir Royale", "Irish Coffee",
+    "Amaretto Sour", "Paloma", "Aperol Spritz", "Gimlet", "Sazerac", "Americano",
+)
+SYNTHETIC_INGREDIENTS = (
+    "Gin", "Vodka", "Light rum", "Tequila", "Lime juice", "Mint", "Sugar", "Triple sec",
+    "Orange juice", "Cranberry juice", "Coffee", "Cream", "Soda water", "Tonic water",
+    "Bourbon", "Sweet Vermouth", "Campari", "Angostura bitters", "Lemon juice", "Ice",
+)
+
+def synthetic_catalog(count):
+    """Return count drinks in TheCocktailDB's JSON shape."""
+    rng = random.Random(42)
+    drinks = []
+    for i in range(count):
+        base = SYNTHETIC_NAMES[i % len(SYNTHETIC_NAMES)]
+        name = base if i < len(SYNTHETIC_NAMES) else f"{base} No. {i // len(SYNTHETIC_NAMES) + 1}"
+        drink = {
+            'idDrink': str(11000 + i),
+            'strDrink': name,
+            'strCategory': rng.choice(["Cocktail", "Ordinary Drink", "Shot"]),
+            'strAlcoholic': "Alcoholic",
+            'strGlass': rng.choice(["Highball glass", "Cocktail glass", "Old-fashioned glass"]),
+            'strInstructions': "Shake with ice and strain into a chilled glass. " * 3,
+            'strDrinkThumb': f"https://example.invalid/images/{11000 + i}.jpg",
+        }
+        for n, ingredient in enumerate(rng.sample(SYNTHETIC_INGREDIENTS, rng.randint(3, 6)), 1):
+            drink[f'strIngredient{n}'] = ingredient
+            drink[f'strMeasure{n}'] = f"{rng.randint(1, 4)} cl"
+        drinks.append(drink)
+    return drinks
+
+def recorded_catalog(path):
+    """Return the drinks of a catalog snapshot in TheCocktailDB's JSON shape."""
+    from services.catalog import load_snapshot
+    catalog = load_snapshot(path)
+    if not catalog:
+        raise SystemExit(f"No catalog snapshot in {path}")
+    return [drink.to_api() for drink in catalog.drinks.values()]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': (values[-1] if values else 0.0) * 1000,
+    }
+
+class StandIn:
+    """Base for the fake servers; GET /calls reports how many API calls were served."""
+
+    def __init__(self, latency):
+        from services.http_server import HttpServer
+        self.latency = latency
+        self.calls = 0
+        self.server = HttpServer()
+        self.server.add_route('GET', '/calls', self._report_calls)
+
+    async def _report_calls(self, request):
+        from services.http_server import HttpResponse
+        return HttpResponse(200, str(self.calls))
+
+class FakeCocktailDB(StandIn):
+    """TheCocktailDB stand-in answering the endpoints the bot uses from a list of drinks."""
+
+    def __init__(self, drinks, latency=0.0):
+        super().__init__(latency)
+        self.drinks = drinks
+        self.by_id = {drink['idDrink']: drink for drink in drinks}
+        self.ingredients = sorted({
+            drink[key] for drink in drinks for key in drink
+            if key.startswith('strIngredient') and drink[key]
+        })
+        for endpoint in ('random', 'search', 'filter', 'lookup', 'list'):
+            self.server.add_route('GET', f"{API_PREFIX}/{endpoint}.php", self._handle)
+
+    def _answer(self, endpoint, params):
+        if endpoint == 'random':
+            return {'drinks': [random.choice(self.drinks)]}
+        if endpoint == 'lookup':
+            drink = self.by_id.get(params.get('i', ''))
+            return {'drinks': [drink] if drink else None}
+        if endpoint == 'list':
+            return {'drinks': [{'strIngredient1': name} for name in self.ingredients]}
+        if endpoint == 'filter':
+            wanted = params.get('i', '').replace('_', ' ').lower()
+            matches = [
+                {'strDrink': d['strDrink'], 'strDrinkThumb': d['strDrinkThumb'], 'idDrink': d['idDrink']}
+                for d in self.drinks
+                if any(k.startswith('strIngredient') and (d[k] or '').lower() == wanted for k in d)
+            ]
+            return {'drinks': matches or 'None Found'}
+        if 's' in params:
+            needle = params['s'].replace('_', ' ').lower()
+            return {'drinks': [d for d in self.drinks if needle in d['strDrink'].lower()] or None}
+        if 'f' in params:
+            first = params['f'].lower()[:1]
+            return {'drinks': [d for d in self.drinks if d['strDrink'].lower().startswith(first)] or None}
+        if 'i' in params:
+            wanted = params['i'].replace('_', ' ').lower()
+            matches = [
+                {'idIngredient': str(n), 'strIngredient': name, 'strDescription': f"{name} is an ingredient.",
+                 'strType': None, 'strAlcohol': None, 'strABV': None}
+                for n, name in enumerate(self.ingredients, 1) if name.lower() == wanted
+            ]
+            return {'ingredients': matches or None}
+        return {'drinks': None}
+
+    async def _handle(self, request):
+        from services.http_server import HttpResponse
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        endpoint = request.path.rsplit('/', 1)[1][:-len('.php')]
+        params = {key: values[0] for key, values in parse_qs(request.query).items()}
+        return HttpResponse(200, json.dumps(self._answer(endpoint, params)), 'application/json')
+
+class FakeBotAPI(StandIn):
+    """Telegram Bot API stand-in that accepts every call the bot makes."""
+
+    METHODS = (
+        'getMe', 'sendMessage', 'sendPhoto', 'sendMediaGroup', 'editMessageText',
+        'answerCallbackQuery', 'deleteMessage', 'setWebhook', 'deleteWebhook',
+    )
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self._message_ids = itertools.count(1)
+        for method in self.METHODS:
+            self.server.add_route('POST', f"/bot{BOT_TOKEN}/{method}", self._handle)
+
+    def _message(self, chat_id, photo=False):
+        message_id = next(self._message_ids)
+        message = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': 'ok',
+        }
+        if photo:
+            message['photo'] = [{
+                'file_id': f"photo{message_id}", 'file_unique_id': f"u{message_id}", 'width': 1, 'height': 1
+            }]
+        return message
+
+    async def _handle(self, request):
+        from services.http_server import HttpResponse
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        method = request.path.rsplit('/', 1)[1]
+        content_type = request.headers.get('content-type', '')
+        params = {}
+        if 'json' in content_type:
+            params = json.loads(request.body or b'{}')
+        elif 'x-www-form-urlencoded' in content_type:
+            params = {key: values[0] for key, values in parse_qs(request.body.decode()).items()}
+        try:
+            chat_id = int(params.get('chat_id', 1))
+        except (TypeError, ValueError):
+            chat_id = 1
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Load test', 'username': 'load_test_bot'}
+        elif method in ('sendMessage', 'editMessageText'):
+            result = self._message(chat_id)
+        elif method == 'sendPhoto':
+            result = self._message(chat_id, photo=True)
+        elif method == 'sendMediaGroup':
+            media = params.get('media', '[]')
+            count = len(json.loads(media) if isinstance(media, str) else media) or 1
+            result = [self._message(chat_id, photo=True) for _ in range(count)]
+        else:
+            result = True
+        return HttpResponse(200, json.dumps({'ok': True, 'result': result}), 'application/json')
+
+def run_stand_ins(args, drinks, ready):
+    """Serve both stand-ins until the process is terminated."""
+    async def serve():
+        cocktail_db = FakeCocktailDB(drinks, latency=args.upstream_latency)
+        bot_api = FakeBotAPI(latency=args.bot_latency)
+        await cocktail_db.server.start('127.0.0.1', args.upstream_port)
+        await bot_api.server.start('127.0.0.1', args.bot_port)
+        ready.set()
+        await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(serve())
+
+async def fetch_calls(port):
+    import httpx
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"http://127.0.0.1:{port}/calls")
+    return int(response.text)
+
+class SimulatedUser:
+    """Builds the updates a Telegram client would send for one private chat."""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, user_id):
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}"}
+        self.chat = {'id': user_id, 'type': 'private'}
+        self._message_ids = itertools.count(1)
+
+    def message(self, text):
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': self.chat,
+            'from': self.user,
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'update_id': next(self._update_ids), 'message': message}
+
+    def button(self, data):
+        return {
+            'update_id': next(self._update_ids),
+            'callback_query': {
+                'id': str(next(self._update_ids)),
+                'from': self.user,
+                'chat_instance': str(self.chat['id']),
+                'data': data,
+                'message': {
+                    'message_id': next(self._message_ids),
+                    'date': int(time.time()),
+                    'chat': self.chat,
+                    'text': 'menu',
+                },
+            },
+        }
+
+def flow_updates(flow, user, drinks, ingredients, rng):
+    if flow == 'search':
+        name = rng.choice(drinks)['strDrink'].split(' No. ')[0]
+        return [user.button('search_drink'), user.message(name)]
+    if flow == 'letter':
+        return [user.button('letter_search'), user.message(rng.choice(drinks)['strDrink'][0])]
+    if flow == 'ingredient':
+        return [user.button('drinks_by_ingredient'), user.message(rng.choice(ingredients))]
+    return [user.message('/random')]
+
+async def run_load(args, drinks):
+    from telegram import Update
+    import bot as bot_module
+
+    logging.getLogger().setLevel(logging.WARNING)
+    ingredients = sorted({
+        drink[key] for drink in drinks for key in drink if key.startswith('strIngredient') and drink[key]
+    })
+
+    application = bot_module.build_application()
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+
+    rng = random.Random(args.seed)
+    weights = [args.mix[flow] for flow in FLOWS]
+    active_users = asyncio.Semaphore(args.concurrency)
+    flow_latencies = {flow: [] for flow in FLOWS}
+    update_latencies = []
+    errors = 0
+
+    async def process(data):
+        update = Update.de_json(data, application.bot)
+        start = time.perf_counter()
+        await application.update_processor.process_update(update, application.process_update(update))
+        elapsed = time.perf_counter() - start
+        update_latencies.append(elapsed)
+        return elapsed
+
+    async def simulate(user_id):
+        nonlocal errors
+        user = SimulatedUser(user_id)
+        async with active_users:
+            for flow in rng.choices(FLOWS, weights, k=args.flows_per_user):
+                try:
+                    elapsed = 0.0
+                    for data in flow_updates(flow, user, drinks, ingredients, rng):
+                        elapsed += await process(data)
+                    flow_latencies[flow].append(elapsed)
+                except Exception as e:
+                    errors += 1
+                    logging.getLogger(__name__).warning(f"{flow} flow failed: {e}")
+                if args.think_time:
+                    await asyncio.sleep(rng.uniform(0, args.think_time))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate(100000 + i) for i in range(args.users)))
+    wall_time = time.perf_counter() - start
+
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+    upstream_calls = await fetch_calls(args.upstream_port)
+    bot_api_calls = await fetch_calls(args.bot_port)
+
+    updates = len(update_latencies)
+    return {
+        'config': {
+            'users': args.users,
+            'flows_per_user': args.flows_per_user,
+            'concurrency': args.concurrency,
+            'drinks': len(drinks),
+            'upstream_latency_ms': args.upstream_latency * 1000,
+            'bot_latency_ms': args.bot_latency * 1000,
+            'telegram_limits': args.telegram_limits,
+            'catalog_mode': os.environ.get('CATALOG_MODE', 'upstream'),
+        },
+        'wall_time_s': wall_time,
+        'updates': updates,
+        'updates_per_s': updates / wall_time if wall_time else 0.0,
+        'upstream_calls': upstream_calls,
+        'upstream_calls_per_update': upstream_calls / updates if updates else 0.0,
+        'bot_api_calls': bot_api_calls,
+        'bot_api_calls_per_update': bot_api_calls / updates if updates else 0.0,
+        'errors': errors,
+        'updates_latency': summarize(update_latencies),
+        'flows': {flow: summarize(latencies) for flow, latencies in flow_latencies.items()},
+    }
+
+def print_report(results):
+    print(f"{results['updates']} updates in {results['wall_time_s']:.2f}s "
+          f"({results['updates_per_s']:.1f} updates/s, {results['errors']} errors)")
+    print(f"upstream calls/update: {results['upstream_calls_per_update']:.3f}  "
+          f"bot API calls/update: {results['bot_api_calls_per_update']:.2f}")
+    print(f"{'flow':<12} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for flow, stats in list(results['flows'].items()) + [('(update)', results['updates_latency'])]:
+        print(f"{flow:<12} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return human-readable regressions against a previous run."""
+    regressions = []
+    for flow, stats in results['flows'].items():
+        previous = baseline.get('flows', {}).get(flow)
+        if not previous or not stats['count']:
+            continue
+        if stats['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{flow} p95 {stats['p95_ms']:.1f}ms > baseline {previous['p95_ms']:.1f}ms")
+    if results['updates_per_s'] < baseline.get('updates_per_s', 0) * (1 - tolerance):
+        regressions.append(
+            f"throughput {results['updates_per_s']:.1f}/s < baseline {baseline['updates_per_s']:.1f}/s"
+        )
+    if results['upstream_calls_per_update'] > baseline.get('upstream_calls_per_update', float('inf')) * (1 + tolerance):
+        regressions.append(
+            f"upstream calls/update {results['upstream_calls_per_update']:.3f} > "
+            f"baseline {baseline['upstream_calls_per_update']:.3f}"
+        )
+    return regressions
+
+def parse_mix(value):
+    mix = dict.fromkeys(FLOWS, 0.0)
+    for part in value.split(','):
+        flow, _, weight = part.partition('=')
+        if flow not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown flow: {flow}")
+        mix[flow] = float(weight)
+    return mix
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--flows-per-user', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=500, help="Users active at the same time")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('search=4,letter=1,ingredient=2,random=3'),
+                        help="Flow weights, e.g. search=4,letter=1,ingredient=2,random=3")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Max pause between flows in seconds")
+    parser.add_argument('--drinks', type=int, default=400, help="Size of the synthetic catalog")
+    parser.add_argument('--catalog', help="Replay drinks from a catalog snapshot instead of synthetic data")
+    parser.add_argument('--snapshot-mode', action='store_true', help="Serve lookups from a local snapshot")
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help="Fake TheCocktailDB latency (s)")
+    parser.add_argument('--bot-latency', type=float, default=0.02, help="Fake Bot API latency (s)")
+    parser.add_argument('--telegram-limits', action='store_true', help="Keep Telegram send rate limits")
+    parser.add_argument('--upstream-port', type=int, default=18081)
+    parser.add_argument('--bot-port', type=int, default=18082)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="Fail if results regress against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression vs. baseline")
+    args = parser.parse_args(argv)
+
+    drinks = recorded_catalog(args.catalog) if args.catalog else synthetic_catalog(args.drinks)
+    workdir = tempfile.mkdtemp(prefix='cocktail-load-')
+
+    # Settings are read at import time, so point them at the stand-ins before importing the bot
+    os.environ.update({
+        'BOT_TOKEN': BOT_TOKEN,
+        'API_URL': f"http://127.0.0.1:{args.bot_port}",
+        'COCKTAIL_DB_URL': f"http://127.0.0.1:{args.upstream_port}{API_PREFIX}",
+        'DATA_DB_PATH': os.path.join(workdir, 'bot.sqlite3'),
+        'CATALOG_MODE': 'snapshot' if args.snapshot_mode else 'upstream',
+    })
+    if not args.telegram_limits:
+        os.environ.update({
+            'TELEGRAM_GLOBAL_RATE': '1000000',
+            'TELEGRAM_CHAT_RATE': '1000000',
+            'TELEGRAM_CHAT_BURST': '1000000',
+            'TELEGRAM_GROUP_MESSAGES_PER_MINUTE': '1000000',
+        })
+    if args.snapshot_mode:
+        from services.catalog import save_snapshot
+        save_snapshot(os.environ['DATA_DB_PATH'], drinks)
+
+    ready = multiprocessing.Event()
+    stand_ins = multiprocessing.Process(target=run_stand_ins, args=(args, drinks, ready), daemon=True)
+    stand_ins.start()
+    try:
+        if not ready.wait(30):
+            raise SystemExit("Stand-in servers did not start")
+        results = asyncio.run(run_load(args, drinks))
+    finally:
+        stand_ins.terminate()
+        stand_ins.join()
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 1 if results['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Stress test for concurrent update processing.
+
+Feeds updates from many chats through PerChatUpdateProcessor the same way
+Application does (one task per update) with a simulated slow upstream call,
+and reports throughput for each concurrency setting. It also checks that
+every chat's updates were handled in the order they arrived.
+
+    python benchmarks/update_concurrency.py --updates 2000 --chats 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from services.update_processor import PerChatUpdateProcessor  # noqa: E402
+
+class _Chat:
+    __slots__ = ('id',)
+
+    def __init__(self, chat_id):
+        self.id = chat_id
+
+class _Update:
+    __slots__ = ('effective_chat', 'sequence')
+
+    def __init__(self, chat_id, sequence):
+        self.effective_chat = _Chat(chat_id)
+        self.sequence = sequence
+
+async def run_once(concurrency, updates, chats, latency):
+    processor = PerChatUpdateProcessor(concurrency)
+    await processor.initialize()
+    handled = {}
+
+    async def handle(update):
+        await asyncio.sleep(latency)
+        handled.setdefault(update.effective_chat.id, []).append(update.sequence)
+
+    batch = [_Update(i % chats, i) for i in range(updates)]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        asyncio.create_task(processor.process_update(update, handle(update))) for update in batch
+    ))
+    elapsed = time.perf_counter() - start
+    await processor.shutdown()
+
+    ordered = all(sequence == sorted(sequence) for sequence in handled.values())
+    return updates / elapsed, ordered
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated handler latency in seconds")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64, 256])
+    args = parser.parse_args(argv)
+
+    print(f"{'concurrency':>11}  {'updates/s':>10}  ordered")
+    baseline = None
+    for concurrency in args.concurrency:
+        throughput, ordered = await run_once(concurrency, args.updates, args.chats, args.latency)
+        baseline = baseline or throughput
+        print(f"{concurrency:>11}  {throughput:>10.1f}  {'yes' if ordered else 'NO'}"
+              f"  ({throughput / baseline:.1f}x)")
+        if not ordered:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -1,10 +1,39 @@
+import time
+# Taken before any other import: the origin of the --profile-startup breakdown
+_STARTED = time.perf_counter()
+from config.settings import (
+    BOT_TOKEN, API_URL, CATALOG_MODE, CATALOG_SNAPSHOT_PATH, CATALOG_IMAGE_PATH, SHARDED_CATALOG_IMAGE_PATH,
+    INGREDIENT_DB_PATH, FILE_ID_DB_PATH, FILE_ID_WARM_CHAT_ID,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST,
+    TELEGRAM_GROUP_MESSAGES_PER_MINUTE, TELEGRAM_SEND_MAX_RETRIES,
+    CONCURRENT_UPDATES, DATA_DB_PATH, PERSISTENCE_UPDATE_INTERVAL, BOT_MODE, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET_TOKEN,
+    METRICS_PATH, METRICS_LISTEN, METRICS_PORT, WORKERS, WORKER_BASE_PORT
+)
+_CONFIG_LOADED = time.perf_counter()
+import argparse
 import asyncio
+import os
+import secrets
+import signal
+from telegram import Bot
 from telegram.ext import (ApplicationBuilder, CommandHandler, CallbackQueryHandler,
-                         ConversationHandler, MessageHandler, filters)
+                         ConversationHandler, InlineQueryHandler, MessageHandler, filters)
 from telegram.constants import ParseMode
 import logging
 import sys
-from config.settings import BOT_TOKEN
+from services.cocktail_service import (
+    init_http_client, close_http_client, load_catalog, warm_catalog, prepare_catalog_image,
+    load_ingredient_catalog, warm_ingredients, start_ingredient_refresh, stop_ingredient_refresh,
+    start_random_pool, stop_random_pool, export_response_cache, import_response_cache,
+    get_cache_stats, get_coalescing_stats, get_random_pool_stats, get_circuit_stats,
+    get_ingredient_stats
+)
+from services.file_id_cache import open_file_id_cache, close_file_id_cache, prewarm_file_ids, get_file_id_stats
+from services import metrics
+from services.persistence import SQLitePersistence
+from services.send_scheduler import SendScheduler
+from services.startup_profile import StartupProfile, FirstPollRequest
+from services.update_processor import PerChatUpdateProcessor
 from handlers.commands import (
     start, help_command, random_drink, handle_button, 
     start_search, search_drink, cancel_search,
@@ -12,29 +41,119 @@ from handlers.commands import (
     start_ingredient_search, search_by_ingredient,
     start_drinks_by_ingredient, search_drinks_by_ingredient_handler,
     about_command,  # Add this import
-    TYPING_SEARCH, TYPING_LETTER, TYPING_INGREDIENT, TYPING_DRINK_BY_INGREDIENT
+    stats_command, inline_query,
+    start_pantry, receive_pantry, show_saved_pantry, find_command,
+    TYPING_SEARCH, TYPING_LETTER, TYPING_INGREDIENT, TYPING_DRINK_BY_INGREDIENT, TYPING_PANTRY
 )
 
 # Set up logging
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_app():
-    """Run the bot application"""
-    if not BOT_TOKEN:
-        logger.error("No bot token provided!")
-        sys.exit(1)
+ALLOWED_UPDATES = ["message", "callback_query", "inline_query"]
+
+# Startup phase timings, logged once the bot receives updates when --profile-startup is given
+startup_profile = StartupProfile(_STARTED, [('config', _CONFIG_LOADED)])
+startup_profile.mark('imports')
+
+# Standalone metrics server, started in post_init when METRICS_PORT is set
+_metrics_server = None
+
+# (index, count) of this process among the workers of a sharded deployment
+_shard = (0, 1)
+
+def _state_name(name):
+    """Name persisted state per worker so workers sharing the store don't overwrite each other."""
+    index, count = _shard
+    return name if count == 1 else f"{name}.{index}"
+
+async def post_init(application):
+    """Open shared resources once the application is initialized"""
+    startup_profile.mark('initialize (getMe, persistence)')
+    await init_http_client()
+    if application.persistence:
+        import_response_cache(application.persistence.load_state(_state_name('response_cache')))
+    startup_profile.mark('response cache')
+    open_file_id_cache(FILE_ID_DB_PATH)
+    startup_profile.mark('file_id cache')
+    catalog = load_catalog()
+    if not catalog and CATALOG_MODE == 'snapshot':
+        logger.warning("No catalog snapshot loaded, falling back to TheCocktailDB")
+    if CATALOG_MODE != 'snapshot' or not catalog:
+        start_random_pool()
+    startup_profile.mark('catalog')
+    load_ingredient_catalog()
+    # Only the first worker fetches ingredients; the others reload them from the store
+    start_ingredient_refresh(fetch=_shard[0] == 0)
+    startup_profile.mark('ingredients')
+    if METRICS_PORT:
+        from services.http_server import HttpServer
+        global _metrics_server
+        _metrics_server = HttpServer()
+        _metrics_server.add_route('GET', METRICS_PATH, metrics.metrics_endpoint)
+        await _metrics_server.start(METRICS_LISTEN, METRICS_PORT + _shard[0])
+
+async def post_shutdown(application):
+    """Release shared resources on shutdown"""
+    global _metrics_server
+    if _metrics_server is not None:
+        await _metrics_server.stop()
+        _metrics_server = None
+    await stop_random_pool()
+    await stop_ingredient_refresh()
+    await close_http_client()
+    close_file_id_cache()
+    if application.persistence:
+        # Saved last so the next start begins with a warm response cache
+        application.persistence.save_state(_state_name('response_cache'), export_response_cache())
+        application.persistence.close()
+
+def register_metrics(application):
+    """Expose the counters of shared components as gauges"""
+    metrics.register_stats('cocktail_cache', get_cache_stats)
+    metrics.register_stats('cocktaildb_coalescing', get_coalescing_stats)
+    metrics.register_stats('random_pool', get_random_pool_stats)
+    metrics.register_stats('ingredient_catalog', get_ingredient_stats)
+    metrics.register_stats('file_id_cache', get_file_id_stats)
+    metrics.register_stats('telegram_send_queue', application.bot.rate_limiter.stats)
+    metrics.register_stats('persistence', application.persistence.stats)
+    metrics.register_collector('cocktaildb_circuit', lambda: {
+        f"cocktaildb_circuit_{endpoint}_{key}": value
+        for endpoint, stats in get_circuit_stats().items() for key, value in stats.items()
+    })
+
+def _first_poll_sent():
+    startup_profile.mark('first getUpdates')
+    startup_profile.report()
 
+def build_application():
+    """Build the application with all handlers registered"""
     # Create application with more generous timeout settings
-    application = (
+    builder = (
         ApplicationBuilder()
         .token(BOT_TOKEN)
+        .base_url(f"{API_URL}/bot")
+        .base_file_url(f"{API_URL}/file/bot")
         .connect_timeout(30.0)  # Increase connection timeout
         .read_timeout(30.0)     # Increase read timeout
         .write_timeout(30.0)    # Increase write timeout
         .pool_timeout(30.0)     # Increase pool timeout
-        .build()
+        .concurrent_updates(PerChatUpdateProcessor(CONCURRENT_UPDATES))
+        .rate_limiter(SendScheduler(
+            # Workers share the bot's global limit; per-chat limits hold as each chat has one worker
+            global_rate=TELEGRAM_GLOBAL_RATE / _shard[1],
+            chat_rate=TELEGRAM_CHAT_RATE,
+            chat_burst=TELEGRAM_CHAT_BURST,
+            group_messages_per_minute=TELEGRAM_GROUP_MESSAGES_PER_MINUTE,
+            max_retries=TELEGRAM_SEND_MAX_RETRIES
+        ))
+        .persistence(SQLitePersistence(DATA_DB_PATH, update_interval=PERSISTENCE_UPDATE_INTERVAL))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
     )
+    if startup_profile.enabled:
+        builder = builder.get_updates_request(FirstPollRequest(_first_poll_sent, connection_pool_size=1))
+    application = builder.build()
 
     # Important: Register conversation handlers FIRST
     search_conv_handler = ConversationHandler(
@@ -49,7 +168,8 @@ def run_app():
             ]
         },
         fallbacks=[CommandHandler('start', start)],
-        name='search_conversation'
+        name='search_conversation',
+        persistent=True
     )
 
     letter_conv_handler = ConversationHandler(
@@ -64,7 +184,8 @@ def run_app():
             ]
         },
         fallbacks=[CommandHandler('start', start)],
-        name='letter_search_conversation'
+        name='letter_search_conversation',
+        persistent=True
     )
 
     # Add new conversation handler for ingredient search
@@ -80,7 +201,8 @@ def run_app():
             ]
         },
         fallbacks=[CommandHandler('start', start)],
-        name='ingredient_search_conversation'
+        name='ingredient_search_conversation',
+        persistent=True
     )
 
     # Add new conversation handler for drinks by ingredient search
@@ -96,7 +218,25 @@ def run_app():
             ]
         },
         fallbacks=[CommandHandler('start', start)],
-        name='drinks_by_ingredient_conversation'
+        name='drinks_by_ingredient_conversation',
+        persistent=True
+    )
+
+    pantry_conv_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(start_pantry, pattern='^pantry$'),
+            CommandHandler("pantry", start_pantry)
+        ],
+        states={
+            TYPING_PANTRY: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, receive_pantry),
+                CallbackQueryHandler(show_saved_pantry, pattern='^pantry_saved$'),
+                CallbackQueryHandler(cancel_search, pattern='^cancel_search$')
+            ]
+        },
+        fallbacks=[CommandHandler('start', start)],
+        name='pantry_conversation',
+        persistent=True
     )
 
     # Register handlers in specific order
@@ -104,26 +244,268 @@ def run_app():
     application.add_handler(letter_conv_handler)
     application.add_handler(ingredient_conv_handler)  # Add the new handler
     application.add_handler(drinks_by_ingredient_conv_handler)  # Add the new handler
+    application.add_handler(pantry_conv_handler)
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("random", random_drink))
     application.add_handler(CommandHandler("about", about_command))  # Add this line
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("find", find_command))
+    application.add_handler(InlineQueryHandler(inline_query))
     # General callback handler must be last
     application.add_handler(CallbackQueryHandler(handle_button))
+    register_metrics(application)
+    return application
+
+def _webhook_secret_token():
+    secret_token = WEBHOOK_SECRET_TOKEN
+    if secret_token is None and WEBHOOK_URL:
+        secret_token = secrets.token_urlsafe(32)
+    if secret_token is None:
+        logger.warning("No WEBHOOK_SECRET_TOKEN set, webhook requests are not authenticated")
+    return secret_token
+
+def _stop_on_signals():
+    """Return an event set on SIGINT/SIGTERM"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Signal handlers are not available on Windows event loops
+            pass
+    return stop_event
+
+async def serve_webhook(application, listen, port, url_path=WEBHOOK_PATH, secret_token=None, register=True):
+    """Receive updates through the embedded webhook server until SIGINT/SIGTERM
+
+    Workers of a sharded deployment pass register=False and the front's
+    secret token: the front owns the webhook registration.
+    """
+    from services.webhook import create_webhook_server
+    if register:
+        secret_token = _webhook_secret_token()
+    server = create_webhook_server(application, url_path, secret_token)
+    server.add_route('GET', METRICS_PATH, metrics.metrics_endpoint)
+    stop_event = _stop_on_signals()
+
+    # run_webhook/run_polling call the post_* hooks themselves; here we drive the lifecycle
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await server.start(listen, port)
+        if register and WEBHOOK_URL:
+            await application.bot.set_webhook(
+                url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=secret_token,
+                allowed_updates=ALLOWED_UPDATES
+            )
+        logger.info("Bot is receiving updates via webhook")
+        startup_profile.mark('webhook listening')
+        startup_profile.report()
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+def _spawn_worker(index, workers, worker_token, image_path):
+    import subprocess
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'worker', '--index', str(index),
+         '--workers', str(workers), '--port', str(WORKER_BASE_PORT + index)],
+        env={**os.environ, 'WORKER_TOKEN': worker_token, 'CATALOG_IMAGE_PATH': image_path}
+    )
+
+async def serve_sharded(workers, listen, port):
+    """Run worker processes behind a webhook front that routes updates by chat until SIGINT/SIGTERM"""
+    import subprocess
+    import httpx
+    from services.shard_front import create_front_server
+    # Built once here so the workers start by mapping the same image
+    image_path = SHARDED_CATALOG_IMAGE_PATH if CATALOG_IMAGE_PATH is None else CATALOG_IMAGE_PATH
+    if image_path:
+        prepare_catalog_image(image_path=image_path)
+    secret_token = _webhook_secret_token()
+    worker_token = secrets.token_urlsafe(32)
+    worker_urls = [f"http://127.0.0.1:{WORKER_BASE_PORT + index}" for index in range(workers)]
+    processes = [_spawn_worker(index, workers, worker_token, image_path) for index in range(workers)]
+    stop_event = _stop_on_signals()
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        server = create_front_server(client, worker_urls, WEBHOOK_PATH, secret_token, worker_token)
+        try:
+            await server.start(listen, port)
+            if WEBHOOK_URL:
+                async with Bot(BOT_TOKEN, base_url=f"{API_URL}/bot") as bot:
+                    await bot.set_webhook(
+                        url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                        secret_token=secret_token,
+                        allowed_updates=ALLOWED_UPDATES
+                    )
+            logger.info(f"Routing webhook updates to {workers} workers")
+            while not stop_event.is_set():
+                for index, process in enumerate(processes):
+                    if process.poll() is not None:
+                        logger.warning(f"Worker {index} exited with {process.returncode}, restarting")
+                        processes[index] = _spawn_worker(index, workers, worker_token, image_path)
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await server.stop()
+            for process in processes:
+                if process.poll() is None:
+                    process.terminate()
+            for process in processes:
+                try:
+                    await asyncio.to_thread(process.wait, 30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+def run_worker(index, workers, port):
+    """Run one shard of a sharded deployment, receiving updates from the front"""
+    from services.shard_front import WORKER_UPDATE_PATH
+    global _shard
+    if not BOT_TOKEN:
+        logger.error("No bot token provided!")
+        sys.exit(1)
+    _shard = (index, workers)
+    application = build_application()
+    asyncio.run(serve_webhook(
+        application, '127.0.0.1', port, url_path=WORKER_UPDATE_PATH,
+        secret_token=os.environ.get('WORKER_TOKEN'), register=False
+    ))
+
+def run_app(mode=BOT_MODE, listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, workers=WORKERS):
+    """Run the bot application"""
+    if not BOT_TOKEN:
+        logger.error("No bot token provided!")
+        sys.exit(1)
+
+    if workers > 1:
+        if mode != 'webhook':
+            logger.error("Multiple workers need webhook mode")
+            sys.exit(1)
+        logger.info(f"Starting bot with {workers} workers...")
+        asyncio.run(serve_sharded(workers, listen, port))
+        return
+
+    application = build_application()
+    startup_profile.mark('application build')
 
     try:
         # Start the bot with error handling
-        logger.info("Starting bot...")
-        application.run_polling(
-            allowed_updates=["message", "callback_query"]
-        )
+        logger.info(f"Starting bot in {mode} mode...")
+        if mode == 'webhook':
+            asyncio.run(serve_webhook(application, listen, port))
+        else:
+            application.run_polling(allowed_updates=ALLOWED_UPDATES)
     except Exception as e:
         logger.error(f"Error running bot: {e}")
         sys.exit(1)
 
+async def run_warm_catalog(path):
+    """Build the local catalog snapshot from TheCocktailDB"""
+    await init_http_client()
+    try:
+        count = await warm_catalog(path)
+        logger.info(f"Catalog snapshot written with {count} drinks")
+    finally:
+        await close_http_client()
+
+async def run_warm_ingredients(path):
+    """Prefetch every ingredient's details from TheCocktailDB"""
+    await init_http_client()
+    try:
+        count = await warm_ingredients(path)
+        logger.info(f"Stored details of {count} ingredients")
+    finally:
+        await close_http_client()
+
+async def run_warm_file_ids(chat_id, delay):
+    """Capture Telegram file_ids for every drink in the catalog snapshot"""
+    catalog = load_catalog()
+    if not catalog:
+        raise RuntimeError("A catalog snapshot is required, run warm-catalog first")
+    open_file_id_cache(FILE_ID_DB_PATH)
+    try:
+        async with Bot(BOT_TOKEN, base_url=f"{API_URL}/bot", base_file_url=f"{API_URL}/file/bot") as bot:
+            await prewarm_file_ids(bot, chat_id, catalog.drinks.values(), delay=delay)
+    finally:
+        close_file_id_cache()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cocktail Finder Telegram bot")
+    parser.add_argument('--webhook', dest='mode', action='store_const', const='webhook',
+                        default=BOT_MODE, help="Receive updates via webhook")
+    parser.add_argument('--polling', dest='mode', action='store_const', const='polling',
+                        help="Receive updates via long polling")
+    parser.add_argument('--listen', default=WEBHOOK_LISTEN, help="Webhook listen address")
+    parser.add_argument('--port', type=int, default=WEBHOOK_PORT, help="Webhook listen port")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Log how long each startup phase took once the bot receives updates")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="Worker processes behind the webhook, each owning a share of the chats")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run', help="Run the bot (default)")
+    worker_parser = subparsers.add_parser('worker', help="Run one worker of a sharded bot (started by --workers)")
+    worker_parser.add_argument('--index', type=int, required=True, help="Worker index")
+    worker_parser.add_argument('--workers', type=int, required=True, help="Number of workers")
+    worker_parser.add_argument('--port', type=int, required=True, help="Local port receiving forwarded updates")
+    warm_parser = subparsers.add_parser('warm-catalog', help="Build the local catalog snapshot")
+    warm_parser.add_argument('--output', default=CATALOG_SNAPSHOT_PATH, help="Snapshot file path")
+    ingredients_parser = subparsers.add_parser('warm-ingredients', help="Prefetch ingredient details")
+    ingredients_parser.add_argument('--output', default=INGREDIENT_DB_PATH, help="Database file path")
+    file_ids_parser = subparsers.add_parser(
+        'warm-file-ids', help="Pre-warm photo file_ids by sending the catalog to a private chat"
+    )
+    file_ids_parser.add_argument('--chat-id', default=FILE_ID_WARM_CHAT_ID, help="Private chat or channel ID")
+    file_ids_parser.add_argument('--delay', type=float, default=3.0, help="Seconds between photos")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    startup_profile.enabled = args.profile_startup
+    if args.command == 'warm-catalog':
+        try:
+            asyncio.run(run_warm_catalog(args.output))
+        except Exception as e:
+            logger.error(f"Error warming catalog: {e}")
+            sys.exit(1)
+        return
+    if args.command == 'warm-ingredients':
+        try:
+            asyncio.run(run_warm_ingredients(args.output))
+        except Exception as e:
+            logger.error(f"Error warming ingredients: {e}")
+            sys.exit(1)
+        return
+    if args.command == 'warm-file-ids':
+        if not args.chat_id:
+            logger.error("No chat ID provided for warm-file-ids!")
+            sys.exit(1)
+        try:
+            asyncio.run(run_warm_file_ids(args.chat_id, args.delay))
+        except Exception as e:
+            logger.error(f"Error warming file_ids: {e}")
+            sys.exit(1)
+        return
+    if args.command == 'worker':
+        run_worker(args.index, args.workers, args.port)
+        return
+    run_app(args.mode, args.listen, args.port, args.workers)
+
 if __name__ == '__main__':
     try:
-        run_app()
+        main()
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
         sys.exit(0)
\ No newline at end of file
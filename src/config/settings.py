@@ -1,15 +1,175 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+def _find_dotenv():
+    """Return the nearest .env file in this directory or its parents, like find_dotenv() does."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, '.env')
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# python-dotenv is only imported when there is a .env file to read
+_dotenv_path = _find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 API_URL = os.getenv("API_URL", "https://api.telegram.org")
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() in ("true", "1", "t")
 
-# Fix API URLs with complete HTTPS paths
-COCKTAIL_API_URL = "www.thecocktaildb.com/api/json/v1/1/random.php"
-COCKTAIL_SEARCH_API_URL = "www.thecocktaildb.com/api/json/v1/1/search.php?s={query}"
-COCKTAIL_LETTER_SEARCH_API_URL = "www.thecocktaildb.com/api/json/v1/1/search.php?f={letter}"
-INGREDIENT_SEARCH_API_URL = "www.thecocktaildb.com/api/json/v1/1/search.php?i={ingredient}"
-DRINKS_BY_INGREDIENT_API_URL = "www.thecocktaildb.com/api/json/v1/1/filter.php?i={ingredient}"
\ No newline at end of file
+# TheCocktailDB endpoints; COCKTAIL_DB_URL can point at a mirror or a local stand-in
+COCKTAIL_DB_URL = os.getenv("COCKTAIL_DB_URL", "https://www.thecocktaildb.com/api/json/v1/1").rstrip('/')
+COCKTAIL_API_URL = f"{COCKTAIL_DB_URL}/random.php"
+COCKTAIL_SEARCH_API_URL = f"{COCKTAIL_DB_URL}/search.php?s={{query}}"
+COCKTAIL_LETTER_SEARCH_API_URL = f"{COCKTAIL_DB_URL}/search.php?f={{letter}}"
+INGREDIENT_SEARCH_API_URL = f"{COCKTAIL_DB_URL}/search.php?i={{ingredient}}"
+DRINKS_BY_INGREDIENT_API_URL = f"{COCKTAIL_DB_URL}/filter.php?i={{ingredient}}"
+COCKTAIL_LOOKUP_API_URL = f"{COCKTAIL_DB_URL}/lookup.php?i={{drink_id}}"
+INGREDIENT_LIST_API_URL = f"{COCKTAIL_DB_URL}/list.php?i=list"
+
+# HTTP client settings for TheCocktailDB
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_MAX_CONCURRENT_REQUESTS = int(os.getenv("HTTP_MAX_CONCURRENT_REQUESTS", "10"))
+
+# Read timeouts per endpoint, in seconds
+ENDPOINT_TIMEOUTS = {
+    'random': float(os.getenv("RANDOM_TIMEOUT", "5")),
+    'search': float(os.getenv("SEARCH_TIMEOUT", "8")),
+    'letter': float(os.getenv("LETTER_SEARCH_TIMEOUT", "10")),
+    'ingredient': float(os.getenv("INGREDIENT_SEARCH_TIMEOUT", "8")),
+    'filter': float(os.getenv("DRINKS_BY_INGREDIENT_TIMEOUT", "8")),
+    'lookup': float(os.getenv("LOOKUP_TIMEOUT", "5")),
+}
+
+# Circuit breaker per TheCocktailDB endpoint: it opens after this many
+# consecutive failures or slow calls and probes again after the reset timeout
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "4"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Send a second, hedged request when the first is slower than the endpoint's
+# observed p95 (needs HEDGE_MIN_SAMPLES completed requests first)
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "False").lower() in ("true", "1", "t")
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "50"))
+
+# Response cache for TheCocktailDB lookups
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+CACHE_STALE_WINDOW = float(os.getenv("CACHE_STALE_WINDOW", "600"))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "120"))
+CACHE_TTLS = {
+    'search': float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+    'letter': float(os.getenv("LETTER_SEARCH_CACHE_TTL", "21600")),
+    'filter': float(os.getenv("DRINKS_BY_INGREDIENT_CACHE_TTL", "21600")),
+    'lookup': float(os.getenv("LOOKUP_CACHE_TTL", "86400")),
+}
+
+# Shared SQLite store for conversation/user data, warm caches, file_ids and the
+# catalog snapshot. Persistence writes are batched every PERSISTENCE_UPDATE_INTERVAL seconds.
+DATA_DB_PATH = os.getenv("DATA_DB_PATH", "data/bot.sqlite3")
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL", "30"))
+
+# Local catalog snapshot. In "snapshot" mode lookups are answered from the
+# snapshot and TheCocktailDB is only used when no snapshot is available.
+CATALOG_MODE = os.getenv("CATALOG_MODE", "upstream").lower()
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", DATA_DB_PATH)
+
+# Read-only catalog image holding the catalog and its indexes as memory-mapped
+# arrays, rebuilt whenever the snapshot is newer; processes mapping it share its
+# pages. Sharded workers (WORKERS > 1) map one at SHARDED_CATALOG_IMAGE_PATH unless
+# CATALOG_IMAGE_PATH is set: a path turns the image on for any run, an empty value
+# always indexes the snapshot in memory.
+CATALOG_IMAGE_PATH = os.getenv("CATALOG_IMAGE_PATH")
+SHARDED_CATALOG_IMAGE_PATH = os.path.join(os.path.dirname(DATA_DB_PATH), "catalog.img")
+
+# Typo-tolerant name search over the local catalog
+FUZZY_MIN_SCORE = float(os.getenv("FUZZY_MIN_SCORE", "0.45"))
+FUZZY_AUTO_MATCH_SCORE = float(os.getenv("FUZZY_AUTO_MATCH_SCORE", "0.75"))
+FUZZY_SUGGESTION_LIMIT = int(os.getenv("FUZZY_SUGGESTION_LIMIT", "5"))
+
+# Drinks per page when browsing names by their first letters
+BROWSE_PAGE_SIZE = int(os.getenv("BROWSE_PAGE_SIZE", "10"))
+
+# Inline mode (@bot mojito): results per page, how long Telegram may cache an
+# answer, and the shortest query sent upstream when no local catalog is loaded
+INLINE_PAGE_SIZE = min(int(os.getenv("INLINE_PAGE_SIZE", "20")), 50)
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+INLINE_MAX_RESULTS = int(os.getenv("INLINE_MAX_RESULTS", "200"))
+INLINE_MIN_UPSTREAM_QUERY = int(os.getenv("INLINE_MIN_UPSTREAM_QUERY", "3"))
+
+# Drinks offered by the "Similar drinks" button, precomputed when the catalog is loaded
+SIMILAR_DRINKS_COUNT = int(os.getenv("SIMILAR_DRINKS_COUNT", "5"))
+
+# Pantry mode (/pantry): drinks missing up to PANTRY_MAX_MISSING ingredients are
+# listed, at most PANTRY_RESULTS_PER_GROUP for each number of missing ingredients;
+# only the first PANTRY_MAX_ITEMS ingredients of a pasted list are kept
+PANTRY_MAX_MISSING = int(os.getenv("PANTRY_MAX_MISSING", "2"))
+PANTRY_RESULTS_PER_GROUP = int(os.getenv("PANTRY_RESULTS_PER_GROUP", "5"))
+PANTRY_MAX_ITEMS = int(os.getenv("PANTRY_MAX_ITEMS", "30"))
+
+# Full-text search (/find) over instructions, glass, category and tags; the index
+# is stored so a catalog refresh only re-indexes the drinks that changed
+FULLTEXT_DB_PATH = os.getenv("FULLTEXT_DB_PATH", DATA_DB_PATH)
+FULLTEXT_RESULT_LIMIT = int(os.getenv("FULLTEXT_RESULT_LIMIT", "10"))
+
+# Prefetched random drinks served by /random
+RANDOM_POOL_SIZE = int(os.getenv("RANDOM_POOL_SIZE", "30"))
+RANDOM_POOL_LOW_WATER = int(os.getenv("RANDOM_POOL_LOW_WATER", "10"))
+RANDOM_POOL_REFILL_CONCURRENCY = int(os.getenv("RANDOM_POOL_REFILL_CONCURRENCY", "3"))
+RANDOM_HISTORY_SIZE = int(os.getenv("RANDOM_HISTORY_SIZE", "20"))
+
+# Telegram file_ids of drink thumbnails, keyed by idDrink
+FILE_ID_DB_PATH = os.getenv("FILE_ID_DB_PATH", DATA_DB_PATH)
+FILE_ID_WARM_CHAT_ID = os.getenv("FILE_ID_WARM_CHAT_ID")
+
+# Ingredient details are prefetched into the store and served from memory.
+# The list is refreshed every INGREDIENT_REFRESH_INTERVAL seconds (default a week),
+# fetching at most INGREDIENT_WARM_CONCURRENCY details at a time.
+INGREDIENT_DB_PATH = os.getenv("INGREDIENT_DB_PATH", DATA_DB_PATH)
+INGREDIENT_REFRESH_INTERVAL = float(os.getenv("INGREDIENT_REFRESH_INTERVAL", "604800"))
+INGREDIENT_REFRESH_RETRY = float(os.getenv("INGREDIENT_REFRESH_RETRY", "900"))
+INGREDIENT_WARM_CONCURRENCY = int(os.getenv("INGREDIENT_WARM_CONCURRENCY", "4"))
+
+# Drinks-by-ingredient results are sent as albums of this many photos (max 10)
+INGREDIENT_RESULTS_PAGE_SIZE = min(int(os.getenv("INGREDIENT_RESULTS_PAGE_SIZE", "10")), 10)
+
+# Outbound Telegram rate limits
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GROUP_MESSAGES_PER_MINUTE = int(os.getenv("TELEGRAM_GROUP_MESSAGES_PER_MINUTE", "20"))
+TELEGRAM_SEND_MAX_RETRIES = int(os.getenv("TELEGRAM_SEND_MAX_RETRIES", "3"))
+
+# How updates are received: "polling" or "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Public base URL registered with Telegram; leave unset if the webhook is registered elsewhere
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+
+# Webhook mode with WORKERS > 1 runs that many bot processes behind one webhook
+# front; worker i owns the chats with chat_id % WORKERS == i and listens on
+# 127.0.0.1:WORKER_BASE_PORT + i
+WORKERS = int(os.getenv("WORKERS", "1"))
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "8450"))
+
+# Updates processed in parallel; updates from one chat always run in order
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+
+# Telegram user IDs allowed to use admin commands such as /stats
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").replace(' ', '').split(',') if user_id}
+
+# Prometheus metrics are served on the webhook server in webhook mode; set
+# METRICS_PORT to also serve them on their own port (e.g. in polling mode)
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
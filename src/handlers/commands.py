@@ -1,16 +1,41 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import (Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto,
+                      InlineQueryResultArticle, InlineQueryResultPhoto, InputTextMessageContent)
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, filters
 from services.cocktail_service import (
-    get_random_cocktail, search_cocktail, search_cocktail_by_letter, 
-    search_ingredient, search_drinks_by_ingredient
+    get_random_cocktail, find_cocktails,
+    search_ingredient, search_drinks_by_ingredient, get_drink, served_stale, find_inline_drinks,
+    browse_drinks, has_similar_drinks, get_similar_drinks, match_pantry, search_full_text
+)
+from services.ingredient_index import parse_ingredient_list
+from services.file_id_cache import get_file_id_cache
+from services.models import Drink, render_caption
+from services.send_scheduler import bulk_sends
+from services import metrics
+from services.metrics import timed_handler
+from config.settings import (
+    ADMIN_IDS, INGREDIENT_RESULTS_PAGE_SIZE, INLINE_PAGE_SIZE, INLINE_CACHE_TIME, BROWSE_PAGE_SIZE,
+    PANTRY_MAX_ITEMS
 )
 import logging
-import asyncio  # Add this import at the top with other imports
+import secrets
 
 logger = logging.getLogger(__name__)
 
 # Update states to include drinks by ingredient search
-(TYPING_SEARCH, TYPING_LETTER, TYPING_INGREDIENT, TYPING_DRINK_BY_INGREDIENT) = range(4)
+(TYPING_SEARCH, TYPING_LETTER, TYPING_INGREDIENT, TYPING_DRINK_BY_INGREDIENT, TYPING_PANTRY) = range(5)
+
+# Longest name prefix (in bytes) accepted by letter search; keeps callback data under 64 bytes
+MAX_BROWSE_PREFIX_BYTES = 40
+
+# Longest ingredient list echoed back in pantry replies; keeps them under Telegram's 4096 characters
+MAX_PANTRY_ECHO_CHARS = 300
+
+# Prepended to results answered from cache or the local snapshot during an outage
+STALE_NOTICE = "⚠️ TheCocktailDB is not responding, results may be out of date.\n\n"
+
+def stale_notice():
+    return STALE_NOTICE if served_stale() else ''
 
 MENU_ACTIONS = {
     'title': '🍸 Cocktail Menu',
@@ -20,6 +45,7 @@ MENU_ACTIONS = {
         ('Search drink by first letter 🔤', 'letter_search'),
         ('Search drink by ingredient 🍶', 'drinks_by_ingredient'),
         ('Search ingredient by name ℹ️', 'ingredient_search'),
+        ('What can I make? 🧺', 'pantry'),
     ],
     'footer_options': [
         ('Help ❓', 'help'),
@@ -41,22 +67,73 @@ def create_menu_keyboard():
     keyboard.append(footer_buttons)
     return InlineKeyboardMarkup(keyboard)
 
+# Static markup is immutable and built once at import instead of on every reply
+MENU_KEYBOARD = create_menu_keyboard()
+MENU_TEXT = f"{MENU_ACTIONS['title']}\nWhat would you like to do?"
+CANCEL_BUTTON = InlineKeyboardButton("❌ Cancel Search", callback_data="cancel_search")
+CANCEL_KEYBOARD = InlineKeyboardMarkup([[CANCEL_BUTTON]])
+
 def get_menu_message():
     """Get menu message with inline keyboard"""
     return {
-        'text': f"{MENU_ACTIONS['title']}\nWhat would you like to do?",
-        'reply_markup': create_menu_keyboard(),
+        'text': MENU_TEXT,
+        'reply_markup': MENU_KEYBOARD,
         'parse_mode': 'Markdown'
     }
 
+def format_drink_caption(drink, header):
+    """Format a drink card caption below the given header"""
+    return f"{header}{render_caption(drink)}"
+
+# Telegram error texts meaning a cached file_id itself is unusable; other
+# BadRequests (e.g. Markdown or caption length) would fail with the URL too
+FILE_ID_ERRORS = ('wrong file identifier', 'wrong remote file identifier', 'file reference', 'file_reference')
+
+def is_file_id_error(error):
+    message = str(error).lower()
+    return any(text in message for text in FILE_ID_ERRORS)
+
+def drink_card_keyboard(drink):
+    """Buttons under a drink card: "Similar drinks" when the catalog knows some"""
+    if not has_similar_drinks(drink.id):
+        return None
+    return InlineKeyboardMarkup([[InlineKeyboardButton("🍹 Similar drinks", callback_data=f"similar:{drink.id}")]])
+
+async def reply_drink_photo(message, drink, caption, reply_markup=None):
+    """Reply with a drink photo, reusing Telegram's file_id when it is known"""
+    file_ids = get_file_id_cache()
+    file_id = file_ids.get(drink.id) if file_ids is not None else None
+    if file_id:
+        try:
+            return await message.reply_photo(
+                photo=file_id, caption=caption, parse_mode='Markdown', reply_markup=reply_markup
+            )
+        except BadRequest as e:
+            if not is_file_id_error(e):
+                raise
+            logger.warning(f"Cached file_id for drink {drink.id} rejected: {e}")
+            file_ids.forget(drink.id)
+
+    sent_message = await message.reply_photo(
+        photo=drink.thumb,
+        caption=caption,
+        parse_mode='Markdown',
+        reply_markup=reply_markup
+    )
+    if file_ids is not None and sent_message.photo:
+        file_ids.set(drink.id, sent_message.photo[-1].file_id)
+    return sent_message
+
+@timed_handler
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message with inline menu."""
     menu_msg = get_menu_message()
     await update.message.reply_text(**menu_msg)
 
+@timed_handler
 async def random_drink(update: Update, context: ContextTypes.DEFAULT_TYPE, from_callback=False):
     """Send a random cocktail."""
-    cocktail = get_random_cocktail()
+    cocktail = await get_random_cocktail(update.effective_user.id)
     
     if not cocktail:
         error_message = "Sorry, couldn't fetch a cocktail right now. Please try again!"
@@ -70,39 +147,18 @@ async def random_drink(update: Update, context: ContextTypes.DEFAULT_TYPE, from_
         return
 
     try:
-        # Format ingredients
-        ingredients = []
-        for i in range(1, 16):
-            ing = cocktail.get(f'strIngredient{i}')
-            meas = cocktail.get(f'strMeasure{i}')
-            if ing:
-                if meas:
-                    ingredients.append(f"🔸 {meas.strip()} {ing}")
-                else:
-                    ingredients.append(f"🔸 {ing}")
-
-        message = (
-            f"🎲 *Random Cocktail!* 🎲\n\n"
-            f"🍸 *{cocktail['strDrink']}*\n"
-            f"📑 *Category:* {cocktail.get('strCategory', 'N/A')}\n\n"
-            f"🧪 *Ingredients:*\n{chr(10).join(ingredients)}\n\n"
-            f"📝 *Instructions:*\n{cocktail.get('strInstructions', 'N/A')}"
+        message = format_drink_caption(
+            cocktail, f"{stale_notice()}🎲 *Random Cocktail!* 🎲\n\n🍸 *{cocktail.name}*\n"
         )
 
         if from_callback:
-            sent_message = await update.callback_query.message.reply_photo(
-                photo=cocktail['strDrinkThumb'],
-                caption=message,
-                parse_mode='Markdown'
+            sent_message = await reply_drink_photo(
+                update.callback_query.message, cocktail, message, drink_card_keyboard(cocktail)
             )
             menu_msg = get_menu_message()
             await sent_message.reply_text(**menu_msg)
         else:
-            sent_message = await update.message.reply_photo(
-                photo=cocktail['strDrinkThumb'],
-                caption=message,
-                parse_mode='Markdown'
-            )
+            sent_message = await reply_drink_photo(update.message, cocktail, message, drink_card_keyboard(cocktail))
             menu_msg = get_menu_message()
             await sent_message.reply_text(**menu_msg)
     except Exception as e:
@@ -116,10 +172,10 @@ async def random_drink(update: Update, context: ContextTypes.DEFAULT_TYPE, from_
             await update.message.reply_text(error_message)
             await update.message.reply_text(**menu_msg)
 
+@timed_handler
 async def start_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start search conversation."""
-    keyboard = [[InlineKeyboardButton("❌ Cancel Search", callback_data="cancel_search")]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = CANCEL_KEYBOARD
     
     if update.callback_query:
         await update.callback_query.answer()
@@ -133,6 +189,7 @@ async def start_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     return TYPING_SEARCH
 
+@timed_handler
 async def cancel_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Cancel search and return to main menu."""
     query = update.callback_query
@@ -141,6 +198,7 @@ async def cancel_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.message.reply_text(**menu_msg)
     return ConversationHandler.END
 
+@timed_handler
 async def search_drink(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the search query."""
     query = update.message.text.strip()
@@ -149,9 +207,28 @@ async def search_drink(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return TYPING_SEARCH
 
     await update.message.reply_text("🔍 Searching...")
-    drinks = search_cocktail(query)
-    
+    drinks, suggestions = await find_cocktails(query)
+
+    if not drinks and suggestions:
+        keyboard = [
+            [InlineKeyboardButton(f"🍸 {drink.name}", callback_data=f"drink:{drink.id}")]
+            for drink in suggestions
+        ]
+        keyboard.append([CANCEL_BUTTON])
+        await update.message.reply_text(
+            f"🤔 No exact match for '{query}'. Did you mean:",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return ConversationHandler.END
+
     if not drinks:
+        matches = search_full_text(query)
+        if matches:
+            await update.message.reply_text(
+                f"🔎 No cocktail is named '{query}', but these recipes mention it:",
+                reply_markup=drink_list_keyboard(matches)
+            )
+            return ConversationHandler.END
         menu_msg = get_menu_message()
         await update.message.reply_text(
             f"❌ No cocktails found matching '{query}'",
@@ -161,37 +238,21 @@ async def search_drink(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         await update.message.reply_text(
-            f"🎯 Found {len(drinks)} cocktail(s) matching '{query}'"
+            f"{stale_notice()}🎯 Found {len(drinks)} cocktail(s) matching '{query}'"
         )
 
         for index, drink in enumerate(drinks, 1):
-            ingredients = []
-            for i in range(1, 16):
-                ing = drink.get(f'strIngredient{i}')
-                meas = drink.get(f'strMeasure{i}')
-                if ing:
-                    if meas:
-                        ingredients.append(f"🔸 {meas.strip()} {ing}")
-                    else:
-                        ingredients.append(f"🔸 {ing}")
-
-            message = (
-                f"🍸 Drink {index} of {len(drinks)}\n"
-                f"*{drink['strDrink']}*\n"
-                f"📑 *Category:* {drink.get('strCategory', 'N/A')}\n\n"
-                f"🧪 *Ingredients:*\n{chr(10).join(ingredients)}\n\n"
-                f"📝 *Instructions:*\n{drink.get('strInstructions', 'N/A')}"
+            message = format_drink_caption(
+                drink, f"🍸 Drink {index} of {len(drinks)}\n*{drink.name}*\n"
             )
 
-            try:
-                await update.message.reply_photo(
-                    photo=drink['strDrinkThumb'],
-                    caption=message,
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                logger.error(f"Error sending photo: {e}")
-                await update.message.reply_text(message, parse_mode='Markdown')
+            reply_markup = drink_card_keyboard(drink)
+            with bulk_sends():
+                try:
+                    await reply_drink_photo(update.message, drink, message, reply_markup)
+                except Exception as e:
+                    logger.error(f"Error sending photo: {e}")
+                    await update.message.reply_text(message, parse_mode='Markdown', reply_markup=reply_markup)
 
     except Exception as e:
         logger.error(f"Error in search_drink: {e}")
@@ -201,10 +262,89 @@ async def search_drink(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(**menu_msg)
     return ConversationHandler.END
 
+def drink_list_keyboard(drinks):
+    """Tap-to-open buttons for drinks, followed by the menu"""
+    keyboard = [
+        [InlineKeyboardButton(f"🍸 {drink.name}", callback_data=f"drink:{drink.id}")]
+        for drink in drinks
+    ]
+    keyboard.extend(list(row) for row in MENU_KEYBOARD.inline_keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+@timed_handler
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Search drink instructions, glass, category, type and tags (/find crushed ice)."""
+    query = ' '.join(context.args).strip() if context.args else ''
+    if not query:
+        await update.message.reply_text(
+            "🔎 Tell me what to look for, e.g. /find crushed ice, /find highball or /find coffee"
+        )
+        return
+
+    drinks = search_full_text(query)
+    if not drinks:
+        menu_msg = get_menu_message()
+        await update.message.reply_text(
+            f"❌ No recipes found mentioning '{query}'",
+            reply_markup=menu_msg['reply_markup']
+        )
+        return
+
+    await update.message.reply_text(
+        f"🔎 Best matches for '{query}':",
+        reply_markup=drink_list_keyboard(drinks)
+    )
+
+@timed_handler
+async def show_drink(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the full recipe for a drink picked from an inline keyboard."""
+    query = update.callback_query
+    drink_id = query.data.split(':', 1)[1]
+    drink = await get_drink(drink_id)
+
+    if not drink:
+        menu_msg = get_menu_message()
+        await query.message.reply_text(
+            "Sorry, couldn't fetch that cocktail right now. Please try again!",
+            reply_markup=menu_msg['reply_markup']
+        )
+        return
+
+    message = format_drink_caption(drink, f"{stale_notice()}🍸 *{drink.name}*\n")
+    reply_markup = drink_card_keyboard(drink)
+    try:
+        await reply_drink_photo(query.message, drink, message, reply_markup)
+    except Exception as e:
+        logger.error(f"Error sending photo: {e}")
+        await query.message.reply_text(message, parse_mode='Markdown', reply_markup=reply_markup)
+
+    menu_msg = get_menu_message()
+    await query.message.reply_text(**menu_msg)
+
+@timed_handler
+async def show_similar_drinks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the drinks most similar to the one on the card as tap-to-open buttons."""
+    query = update.callback_query
+    drink_id = query.data.split(':', 1)[1]
+    drinks = [drink for drink in get_similar_drinks(drink_id) if drink is not None]
+
+    if not drinks:
+        menu_msg = get_menu_message()
+        await query.message.reply_text(
+            "Sorry, no similar cocktails found.",
+            reply_markup=menu_msg['reply_markup']
+        )
+        return
+
+    await query.message.reply_text(
+        "🍹 Cocktails with similar ingredients:",
+        reply_markup=drink_list_keyboard(drinks)
+    )
+
+@timed_handler
 async def start_letter_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start letter search conversation."""
-    keyboard = [[InlineKeyboardButton("❌ Cancel Search", callback_data="cancel_search")]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = CANCEL_KEYBOARD
     
     if update.callback_query:
         await update.callback_query.answer()
@@ -213,54 +353,82 @@ async def start_letter_search(update: Update, context: ContextTypes.DEFAULT_TYPE
         message = update.message
 
     await message.reply_text(
-        "🔤 Please enter a single letter (A-Z) to find cocktails:",
+        "🔤 Please enter a letter or the first letters of a name (e.g. B, Bl, Mar) to browse cocktails:",
         reply_markup=reply_markup
     )
     return TYPING_LETTER
 
+@timed_handler
 async def search_by_letter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the letter search query."""
-    letter = update.message.text.strip().upper()
-    if not letter.isalpha() or len(letter) != 1:
-        await update.message.reply_text("Please enter a single letter (A-Z).")
+    prefix = ' '.join(update.message.text.split())
+    if not prefix or len(prefix.encode()) > MAX_BROWSE_PREFIX_BYTES or not prefix[0].isalnum():
+        await update.message.reply_text("Please enter a letter or the first letters of a name (e.g. B, Bl, Mar).")
         return TYPING_LETTER
 
-    await update.message.reply_text(f"🔍 Searching for cocktails starting with '{letter}'...")
-    drinks = search_cocktail_by_letter(letter)
-
-    if not drinks:
+    try:
+        text, reply_markup = await render_browse_page(prefix, 0)
+    except Exception as e:
+        logger.error(f"Error in search_by_letter: {e}")
         menu_msg = get_menu_message()
         await update.message.reply_text(
-            f"❌ No cocktails found starting with '{letter}'",
+            "❌ Something went wrong. Please try again!",
             reply_markup=menu_msg['reply_markup']
         )
         return ConversationHandler.END
 
-    try:
-        message = f"Found {len(drinks)} cocktail(s) starting with '{letter}':\n\n"
-        for drink in drinks:
-            message += f"🍸 {drink['strDrink']}\n"
-
-        # Split message if too long
-        if len(message) > 4000:
-            chunks = [message[i:i+4000] for i in range(0, len(message), 4000)]
-            for chunk in chunks:
-                await update.message.reply_text(chunk)
-        else:
-            await update.message.reply_text(message)
+    await update.message.reply_text(text, reply_markup=reply_markup)
+    return ConversationHandler.END
 
-    except Exception as e:
-        logger.error(f"Error in search_by_letter: {e}")
-        await update.message.reply_text("❌ Something went wrong. Please try again!")
+async def render_browse_page(prefix, page):
+    """Build the text and keyboard for one page of drinks whose name starts with prefix"""
+    entries, total = await browse_drinks(prefix, page, BROWSE_PAGE_SIZE)
+    if total and not entries:
+        # The page no longer exists (e.g. the catalog changed); show the last one
+        page = (total - 1) // BROWSE_PAGE_SIZE
+        entries, total = await browse_drinks(prefix, page, BROWSE_PAGE_SIZE)
+
+    keyboard = [
+        [InlineKeyboardButton(f"🍸 {name}", callback_data=f"drink:{drink_id}")]
+        for drink_id, name in entries
+    ]
+    page_count = (total + BROWSE_PAGE_SIZE - 1) // BROWSE_PAGE_SIZE
+    nav_buttons = []
+    if page > 0:
+        nav_buttons.append(InlineKeyboardButton("◀ Prev", callback_data=f"letter_page:{page - 1}:{prefix}"))
+    if page < page_count - 1:
+        nav_buttons.append(InlineKeyboardButton("Next ▶", callback_data=f"letter_page:{page + 1}:{prefix}"))
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+    keyboard.extend(list(row) for row in MENU_KEYBOARD.inline_keyboard)
+
+    if not total:
+        text = f"{stale_notice()}❌ No cocktails found starting with '{prefix}'"
+    else:
+        first = page * BROWSE_PAGE_SIZE
+        text = (
+            f"{stale_notice()}🔤 {total} cocktail(s) starting with '{prefix}' "
+            f"({first + 1}–{first + len(entries)}, page {page + 1}/{page_count}). Tap one for the recipe:"
+        )
+    return text, InlineKeyboardMarkup(keyboard)
 
-    menu_msg = get_menu_message()
-    await update.message.reply_text(**menu_msg)
-    return ConversationHandler.END
+@timed_handler
+async def letter_results_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show another page of letter search results in place."""
+    query = update.callback_query
+    _, page, prefix = query.data.split(':', 2)
+    text, reply_markup = await render_browse_page(prefix, int(page))
+    try:
+        await query.message.edit_text(text, reply_markup=reply_markup)
+    except BadRequest as e:
+        # Pressing the same button twice leaves the message unchanged
+        if 'not modified' not in str(e).lower():
+            raise
 
+@timed_handler
 async def start_ingredient_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start ingredient search conversation."""
-    keyboard = [[InlineKeyboardButton("❌ Cancel Search", callback_data="cancel_search")]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = CANCEL_KEYBOARD
     
     if update.callback_query:
         await update.callback_query.answer()
@@ -274,6 +442,7 @@ async def start_ingredient_search(update: Update, context: ContextTypes.DEFAULT_
     )
     return TYPING_INGREDIENT
 
+@timed_handler
 async def search_by_ingredient(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the ingredient search query."""
     query = update.message.text.strip()
@@ -282,7 +451,7 @@ async def search_by_ingredient(update: Update, context: ContextTypes.DEFAULT_TYP
         return TYPING_INGREDIENT
 
     await update.message.reply_text("🔍 Searching...")
-    ingredients = search_ingredient(query)
+    ingredients = await search_ingredient(query)
     
     if not ingredients:
         menu_msg = get_menu_message()
@@ -314,10 +483,10 @@ async def search_by_ingredient(update: Update, context: ContextTypes.DEFAULT_TYP
     return ConversationHandler.END
 
 # Add new handlers
+@timed_handler
 async def start_drinks_by_ingredient(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start drinks by ingredient search conversation."""
-    keyboard = [[InlineKeyboardButton("❌ Cancel Search", callback_data="cancel_search")]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = CANCEL_KEYBOARD
     
     if update.callback_query:
         await update.callback_query.answer()
@@ -326,11 +495,13 @@ async def start_drinks_by_ingredient(update: Update, context: ContextTypes.DEFAU
         message = update.message
 
     await message.reply_text(
-        "🍶 Please enter an ingredient to find drinks (e.g., Gin, Vodka, Rum):",
+        "🍶 Please enter one or more ingredients to find drinks, separated by commas or + "
+        "(e.g., Gin or Gin, Lime, Mint):",
         reply_markup=reply_markup
     )
     return TYPING_DRINK_BY_INGREDIENT
 
+@timed_handler
 async def search_drinks_by_ingredient_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the drinks by ingredient search query."""
     query = update.message.text.strip()
@@ -339,147 +510,385 @@ async def search_drinks_by_ingredient_handler(update: Update, context: ContextTy
         return TYPING_DRINK_BY_INGREDIENT
 
     await update.message.reply_text(f"🔍 Searching for drinks with ingredient '{query}'...")
-    drinks = search_drinks_by_ingredient(query)
+    drinks = await search_drinks_by_ingredient(query)
     
     if not drinks:
         menu_msg = get_menu_message()
         await update.message.reply_text(
-            f"❌ No drinks found with ingredient '{query}'. Please try another ingredient (e.g., Gin, Vodka, Rum, Tequila)",
+            f"❌ No drinks found with ingredients '{query}'. Please try other ingredients (e.g., Gin, Vodka, Rum, Tequila)",
             reply_markup=menu_msg['reply_markup']
         )
         return ConversationHandler.END
 
+    results = {
+        'id': secrets.token_hex(4),
+        'query': query,
+        'drinks': [(drink.id, drink.name, drink.thumb) for drink in drinks],
+        'stale': served_stale()
+    }
+    context.user_data['ingredient_results'] = results
+
     try:
-        total_drinks = len(drinks)
-        await update.message.reply_text(
-            f"🎯 Found {total_drinks} drink(s) containing '{query}'"
-        )
+        await send_ingredient_results_page(update.message, results, 0)
+    except Exception as e:
+        logger.error(f"Error in search_drinks_by_ingredient: {e}")
+        await update.message.reply_text("❌ Something went wrong. Please try again!")
+        menu_msg = get_menu_message()
+        await update.message.reply_text(**menu_msg)
 
-        # Send drinks in smaller batches to avoid rate limits
-        batch_size = 5
-        current_drink = 0
+    return ConversationHandler.END
 
-        for i in range(0, total_drinks, batch_size):
-            batch = drinks[i:i + batch_size]
-            for drink in batch:
-                current_drink += 1
-                try:
-                    message = (
-                        f"🍸 *{drink['strDrink']}*\n"
-                        f"Drink {current_drink} of {total_drinks} with {query}"
-                    )
-                    await update.message.reply_photo(
-                        photo=drink['strDrinkThumb'],
-                        caption=message,
-                        parse_mode='Markdown'
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending photo for drink {drink['strDrink']}: {e}")
-                    await update.message.reply_text(message, parse_mode='Markdown')
-            
-            # Add a small delay between batches to avoid rate limits
-            if i + batch_size < total_drinks:
-                await asyncio.sleep(0.5)
-
-        # Send completion message
-        await update.message.reply_text(
-            f"✅ Successfully displayed all {total_drinks} drinks containing '{query}'"
+# Headers of the pantry result groups by number of missing ingredients
+PANTRY_GROUP_TITLES = {0: "✅ You can make", 1: "🛒 Missing 1 ingredient", 2: "🛒 Missing 2 ingredients"}
+
+def parse_pantry(text):
+    """Parse a pantry list, keeping at most PANTRY_MAX_ITEMS ingredients."""
+    return parse_ingredient_list(text)[:PANTRY_MAX_ITEMS]
+
+def format_pantry_items(names):
+    """Join ingredient names with commas, cut off at MAX_PANTRY_ECHO_CHARS."""
+    text = ', '.join(names)
+    if len(text) <= MAX_PANTRY_ECHO_CHARS:
+        return text
+    return text[:MAX_PANTRY_ECHO_CHARS - 1].rstrip(', ') + '…'
+
+async def reply_pantry_results(message, pantry):
+    """Reply with the drinks a pantry covers, then those missing one or two ingredients"""
+    result = match_pantry(pantry)
+    if result is None:
+        menu_msg = get_menu_message()
+        await message.reply_text(
+            "Sorry, pantry matching needs the offline catalog, which isn't loaded right now.",
+            reply_markup=menu_msg['reply_markup']
         )
+        return
+    matches, totals, unknown = result
 
+    lines = [f"🧺 Your pantry: {format_pantry_items(pantry)}"]
+    if unknown:
+        lines.append(f"⚠️ Not used in any drink: {format_pantry_items(unknown)}")
+    if not matches:
+        lines.append("\n❌ No drinks found. Try adding a few more ingredients.")
+    keyboard = []
+    group = None
+    for drink, missing in matches:
+        count = len(missing)
+        if count != group:
+            group = count
+            title = PANTRY_GROUP_TITLES.get(count, f"🛒 Missing {count} ingredients")
+            lines.append(f"\n{title} ({totals[count]}):")
+        lines.append(f"• {drink.name} — needs {', '.join(missing)}" if missing else f"• {drink.name}")
+        keyboard.append([InlineKeyboardButton(f"🍸 {drink.name}", callback_data=f"drink:{drink.id}")])
+    keyboard.extend(list(row) for row in MENU_KEYBOARD.inline_keyboard)
+    try:
+        await message.reply_text('\n'.join(lines), reply_markup=InlineKeyboardMarkup(keyboard))
     except Exception as e:
-        logger.error(f"Error in search_drinks_by_ingredient: {e}")
-        await update.message.reply_text("❌ Something went wrong. Please try again!")
+        logger.error(f"Error in reply_pantry_results: {e}")
+        menu_msg = get_menu_message()
+        await message.reply_text(
+            "❌ Something went wrong. Please try again!",
+            reply_markup=menu_msg['reply_markup']
+        )
+
+@timed_handler
+async def start_pantry(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start pantry mode; /pantry followed by ingredients sets the pantry right away."""
+    if update.callback_query:
+        await update.callback_query.answer()
+        message = update.callback_query.message
+    else:
+        message = update.message
+
+    pantry = parse_pantry(' '.join(context.args)) if context.args else None
+    if pantry:
+        context.user_data['pantry'] = pantry
+        await reply_pantry_results(message, pantry)
         return ConversationHandler.END
 
-    menu_msg = get_menu_message()
-    await update.message.reply_text(**menu_msg)
+    keyboard = [[CANCEL_BUTTON]]
+    text = "🧺 Please enter the ingredients you have, separated by commas (e.g., Gin, Lime juice, Mint, Sugar):"
+    saved = context.user_data.get('pantry')
+    if saved:
+        keyboard.insert(0, [InlineKeyboardButton("🧺 Use my saved pantry", callback_data="pantry_saved")])
+        text = f"🧺 Your saved pantry: {format_pantry_items(saved)}\n\nSend a new list to replace it, or use the saved one:"
+    await message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    return TYPING_PANTRY
+
+@timed_handler
+async def receive_pantry(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Save the ingredients the user has and show what they can make."""
+    pantry = parse_pantry(update.message.text)
+    if not pantry:
+        await update.message.reply_text("Please enter at least one ingredient.")
+        return TYPING_PANTRY
+
+    context.user_data['pantry'] = pantry
+    await reply_pantry_results(update.message, pantry)
     return ConversationHandler.END
 
+@timed_handler
+async def show_saved_pantry(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show what the saved pantry can make."""
+    query = update.callback_query
+    await query.answer()
+    pantry = context.user_data.get('pantry')
+    if not pantry:
+        return await start_pantry(update, context)
+    await reply_pantry_results(query.message, pantry)
+    return ConversationHandler.END
+
+async def send_ingredient_results_page(message, results, page):
+    """Send one page of drinks-by-ingredient results as an album plus a navigation message"""
+    drinks = results['drinks']
+    total_drinks = len(drinks)
+    page_count = (total_drinks + INGREDIENT_RESULTS_PAGE_SIZE - 1) // INGREDIENT_RESULTS_PAGE_SIZE
+    page = max(0, min(page, page_count - 1))
+    first = page * INGREDIENT_RESULTS_PAGE_SIZE
+    page_drinks = drinks[first:first + INGREDIENT_RESULTS_PAGE_SIZE]
+
+    captions = [
+        f"🍸 *{name}*\nDrink {first + index} of {total_drinks} with {results['query']}"
+        for index, (drink_id, name, thumb) in enumerate(page_drinks, 1)
+    ]
+    with bulk_sends():
+        try:
+            await reply_drink_album(message, page_drinks, captions)
+        except Exception as e:
+            logger.error(f"Error sending drinks album: {e}")
+            await message.reply_text('\n'.join(captions), parse_mode='Markdown')
+
+    nav_buttons = []
+    if page > 0:
+        nav_buttons.append(InlineKeyboardButton(
+            "◀ Prev", callback_data=f"ing_page:{results['id']}:{page - 1}"
+        ))
+    if page < page_count - 1:
+        nav_buttons.append(InlineKeyboardButton(
+            "Next ▶", callback_data=f"ing_page:{results['id']}:{page + 1}"
+        ))
+    keyboard = [nav_buttons] if nav_buttons else []
+    keyboard.extend(list(row) for row in MENU_KEYBOARD.inline_keyboard)
+
+    await message.reply_text(
+        f"{STALE_NOTICE if results.get('stale') else ''}"
+        f"🎯 Drinks {first + 1}–{first + len(page_drinks)} of {total_drinks} "
+        f"containing '{results['query']}' (page {page + 1}/{page_count})",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def reply_drink_album(message, drinks, captions):
+    """Reply with up to 10 drink photos as one media group, reusing cached file_ids"""
+    if len(drinks) == 1:
+        # Telegram requires at least two items in a media group
+        drink_id, name, thumb = drinks[0]
+        sent_message = await reply_drink_photo(
+            message, Drink(drink_id, name, thumb=thumb), captions[0]
+        )
+        return [sent_message]
+
+    file_ids = get_file_id_cache()
+    known = [file_ids.get(drink_id) if file_ids is not None else None for drink_id, name, thumb in drinks]
+
+    def build_media(use_file_ids):
+        return [
+            InputMediaPhoto(
+                media=(file_id if use_file_ids and file_id else thumb),
+                caption=caption,
+                parse_mode='Markdown'
+            )
+            for (drink_id, name, thumb), file_id, caption in zip(drinks, known, captions)
+        ]
+
+    if any(known):
+        try:
+            return await message.reply_media_group(media=build_media(True))
+        except BadRequest as e:
+            if not is_file_id_error(e):
+                raise
+            logger.warning(f"Cached file_ids rejected in album: {e}")
+            for (drink_id, name, thumb), file_id in zip(drinks, known):
+                if file_id:
+                    file_ids.forget(drink_id)
+            known = [None] * len(drinks)
+
+    sent_messages = await message.reply_media_group(media=build_media(False))
+    if file_ids is not None:
+        for (drink_id, name, thumb), sent_message in zip(drinks, sent_messages):
+            if sent_message.photo:
+                file_ids.set(drink_id, sent_message.photo[-1].file_id)
+    return sent_messages
+
+@timed_handler
+async def ingredient_results_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show another page of the user's last drinks-by-ingredient results"""
+    query = update.callback_query
+    _, results_id, page = query.data.split(':')
+    results = context.user_data.get('ingredient_results')
+
+    if not results or results['id'] != results_id:
+        menu_msg = get_menu_message()
+        await query.message.reply_text(
+            "⌛ These results have expired. Please search again.",
+            reply_markup=menu_msg['reply_markup']
+        )
+        return
+
+    try:
+        await send_ingredient_results_page(query.message, results, int(page))
+    except Exception as e:
+        logger.error(f"Error in ingredient_results_page: {e}")
+        await query.message.reply_text("❌ Something went wrong. Please try again!")
+
+# Static texts for /help and /about
+HELP_TEXT = (
+    "*🍸 Welcome to Cocktail Bot - Your Personal Mixologist*\n\n"
+    "*Command Reference:*\n"
+    "• `/start` - Launch the main menu\n"
+    "• `/help` - Display this help guide\n"
+    "• `/random` - Get a random cocktail recipe\n"
+    "• `/pantry gin, lime, mint` - See what you can make with what you have\n"
+    "• `/find crushed ice` - Search recipes, glasses and categories\n"
+    "• `/about` - View information about the bot and developer\n\n"
+    "*Available Features:*\n"
+    "1️⃣ *Random Cocktail Discovery*\n"
+    "   • Get random cocktail suggestions\n"
+    "   • Complete with recipes and images\n"
+    "   • Perfect for trying something new\n\n"
+    "2️⃣ *Search Capabilities*\n"
+    "   • Search by cocktail name\n"
+    "   • Browse by first letter\n"
+    "   • Find drinks by ingredient\n"
+    "   • Explore ingredient information\n\n"
+    "3️⃣ *Detailed Information*\n"
+    "   • Full ingredient lists\n"
+    "   • Step-by-step instructions\n"
+    "   • High-quality drink images\n"
+    "   • Ingredient details and properties\n\n"
+    "*Pro Tips:*\n"
+    "📌 *For Best Results:*\n"
+    "   • Use exact ingredient names (e.g., 'Gin', 'Vodka')\n"
+    "   • Try alternative spellings if no results\n"
+    "   • Use the ingredient search for detailed info\n\n"
+    "📌 *Navigation:*\n"
+    "   • Use menu buttons for easy access\n"
+    "   • Cancel searches anytime with ❌\n"
+    "   • Return to menu with /start\n\n"
+    "*Need More Help?*\n"
+    "Use the About section to contact the developer for support or suggestions."
+)
+
+ABOUT_TEXT = (
+    "*🍸 About Cocktail Bot*\n\n"
+    "This bot helps you discover and learn about various cocktails and their ingredients. "
+    "Whether you're a professional bartender or just looking to make something special at home, "
+    "this bot provides easy access to a vast database of cocktail recipes and ingredient information.\n\n"
+    "*Features:*\n"
+    "• Comprehensive cocktail database\n"
+    "• Multiple search options\n"
+    "• Detailed ingredient information\n"
+    "• High-quality cocktail images\n"
+    "• Easy-to-follow recipes\n\n"
+    "*👨‍💻 Developer Information*\n"
+    "Created by Ali Shahriari\n\n"
+    "*Find me on:*\n"
+    "• Twitter: @alishahriarioff\n"
+    "• Instagram: @alishahriarioff\n"
+    "• LinkedIn: @alishahriarioff\n"
+    "• GitHub: @alishahriarioff\n\n"
+    "Feel free to reach out for feedback or suggestions!"
+)
+
+@timed_handler
 async def help_command(update, context, from_callback=False):
     """Send help message and show menu."""
-    help_text = (
-        "*🍸 Welcome to Cocktail Bot - Your Personal Mixologist*\n\n"
-        "*Command Reference:*\n"
-        "• `/start` - Launch the main menu\n"
-        "• `/help` - Display this help guide\n"
-        "• `/random` - Get a random cocktail recipe\n"
-        "• `/about` - View information about the bot and developer\n\n"
-        "*Available Features:*\n"
-        "1️⃣ *Random Cocktail Discovery*\n"
-        "   • Get random cocktail suggestions\n"
-        "   • Complete with recipes and images\n"
-        "   • Perfect for trying something new\n\n"
-        "2️⃣ *Search Capabilities*\n"
-        "   • Search by cocktail name\n"
-        "   • Browse by first letter\n"
-        "   • Find drinks by ingredient\n"
-        "   • Explore ingredient information\n\n"
-        "3️⃣ *Detailed Information*\n"
-        "   • Full ingredient lists\n"
-        "   • Step-by-step instructions\n"
-        "   • High-quality drink images\n"
-        "   • Ingredient details and properties\n\n"
-        "*Pro Tips:*\n"
-        "📌 *For Best Results:*\n"
-        "   • Use exact ingredient names (e.g., 'Gin', 'Vodka')\n"
-        "   • Try alternative spellings if no results\n"
-        "   • Use the ingredient search for detailed info\n\n"
-        "📌 *Navigation:*\n"
-        "   • Use menu buttons for easy access\n"
-        "   • Cancel searches anytime with ❌\n"
-        "   • Return to menu with /start\n\n"
-        "*Need More Help?*\n"
-        "Use the About section to contact the developer for support or suggestions."
-    )
-    
     menu_msg = get_menu_message()
     
     if from_callback:
         await update.callback_query.message.edit_text(
-            text=help_text,
+            text=HELP_TEXT,
             reply_markup=menu_msg['reply_markup'],
             parse_mode='Markdown'
         )
     else:
-        await update.message.reply_text(help_text, parse_mode='Markdown')
+        await update.message.reply_text(HELP_TEXT, parse_mode='Markdown')
         await update.message.reply_text(**menu_msg)
 
+@timed_handler
 async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE, from_callback=False):
     """Send information about the bot and developer."""
-    about_text = (
-        "*🍸 About Cocktail Bot*\n\n"
-        "This bot helps you discover and learn about various cocktails and their ingredients. "
-        "Whether you're a professional bartender or just looking to make something special at home, "
-        "this bot provides easy access to a vast database of cocktail recipes and ingredient information.\n\n"
-        "*Features:*\n"
-        "• Comprehensive cocktail database\n"
-        "• Multiple search options\n"
-        "• Detailed ingredient information\n"
-        "• High-quality cocktail images\n"
-        "• Easy-to-follow recipes\n\n"
-        "*👨‍💻 Developer Information*\n"
-        "Created by Ali Shahriari\n\n"
-        "*Find me on:*\n"
-        "• Twitter: @alishahriarioff\n"
-        "• Instagram: @alishahriarioff\n"
-        "• LinkedIn: @alishahriarioff\n"
-        "• GitHub: @alishahriarioff\n\n"
-        "Feel free to reach out for feedback or suggestions!"
-    )
-
     menu_msg = get_menu_message()
     
     if from_callback:
         await update.callback_query.message.edit_text(
-            text=about_text,
+            text=ABOUT_TEXT,
             reply_markup=menu_msg['reply_markup'],
             parse_mode='Markdown'
         )
     else:
-        await update.message.reply_text(about_text, parse_mode='Markdown')
+        await update.message.reply_text(ABOUT_TEXT, parse_mode='Markdown')
         await update.message.reply_text(**menu_msg)
 
+# Photo captions are limited to 1024 characters; longer recipes are sent as text
+PHOTO_CAPTION_LIMIT = 1024
+
+_inline_results = {}  # drink id -> (drink, InlineQueryResult)
+
+def inline_result(drink):
+    """Build the inline result for a drink, reusing it while the Drink object is unchanged"""
+    cached = _inline_results.get(drink.id)
+    if cached is not None and cached[0] is drink:
+        return cached[1]
+
+    caption = format_drink_caption(drink, f"🍸 *{drink.name}*\n")
+    description = ', '.join(ingredient for _, ingredient in drink.ingredients[:4])
+    if drink.thumb and len(caption) <= PHOTO_CAPTION_LIMIT:
+        result = InlineQueryResultPhoto(
+            id=drink.id,
+            photo_url=drink.thumb,
+            thumbnail_url=f"{drink.thumb}/preview",
+            title=drink.name,
+            description=description,
+            caption=caption,
+            parse_mode='Markdown'
+        )
+    else:
+        result = InlineQueryResultArticle(
+            id=drink.id,
+            title=drink.name,
+            description=description,
+            thumbnail_url=f"{drink.thumb}/preview" if drink.thumb else None,
+            input_message_content=InputTextMessageContent(caption, parse_mode='Markdown')
+        )
+    _inline_results[drink.id] = (drink, result)
+    return result
+
+@timed_handler
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer inline queries (@bot mojito) from the local name index."""
+    inline = update.inline_query
+    try:
+        offset = max(0, int(inline.offset or 0))
+    except ValueError:
+        offset = 0
+    drinks, next_offset = await find_inline_drinks(inline.query, offset, INLINE_PAGE_SIZE)
+    await inline.answer(
+        [inline_result(drink) for drink in drinks],
+        cache_time=INLINE_CACHE_TIME,
+        next_offset=str(next_offset) if next_offset is not None else ''
+    )
+
+@timed_handler
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show runtime metrics to bot admins."""
+    if update.effective_user is None or update.effective_user.id not in ADMIN_IDS:
+        return
+    report = metrics.summary()
+    # Telegram messages are limited to 4096 characters
+    for i in range(0, len(report), 4000):
+        await update.message.reply_text(report[i:i + 4000])
+
 # Update handle_button to include about command
+# Not timed: every handler it dispatches to records its own latency
 async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle button presses from inline keyboard."""
     query = update.callback_query
@@ -495,9 +904,21 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await start_drinks_by_ingredient(update, context)
     elif query.data == 'ingredient_search':
         return await start_ingredient_search(update, context)
+    elif query.data == 'pantry':
+        return await start_pantry(update, context)
+    elif query.data == 'pantry_saved':
+        return await show_saved_pantry(update, context)
     elif query.data == 'cancel_search':
         return await cancel_search(update, context)
     elif query.data == 'help':
         await help_command(update, context, from_callback=True)
     elif query.data == 'about':
-        await about_command(update, context, from_callback=True)
\ No newline at end of file
+        await about_command(update, context, from_callback=True)
+    elif query.data.startswith('drink:'):
+        await show_drink(update, context)
+    elif query.data.startswith('similar:'):
+        await show_similar_drinks(update, context)
+    elif query.data.startswith('ing_page:'):
+        await ingredient_results_page(update, context)
+    elif query.data.startswith('letter_page:'):
+        await letter_results_page(update, context)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Bounded in-process LRU cache with per-entry TTL and stale-while-revalidate.
+
+    Entries past their TTL but still inside the stale window are served
+    immediately while a single background task refreshes them.
+    """
+
+    def __init__(self, max_entries=1000, stale_window=300.0):
+        self.max_entries = max_entries
+        self.stale_window = stale_window
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._refreshing = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return (found, value, is_stale) without triggering any loading."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None, False
+        value, expires_at = entry
+        now = time.monotonic()
+        if now >= expires_at + self.stale_window:
+            # Kept until evicted so get_fallback() can still serve it during outages
+            return False, None, False
+        self._entries.move_to_end(key)
+        return True, value, now >= expires_at
+
+    def get_fallback(self, key):
+        """Return (found, value) for key regardless of its age."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        return True, entry[0]
+
+    def set(self, key, value, ttl):
+        """Store a value for ttl seconds, evicting least recently used entries."""
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def export_entries(self):
+        """Return (key, value, seconds until expiry) for every entry still servable, oldest first."""
+        now = time.monotonic()
+        return [
+            (key, value, expires_at - now)
+            for key, (value, expires_at) in self._entries.items()
+            if now < expires_at + self.stale_window
+        ]
+
+    def import_entries(self, entries):
+        """Restore entries produced by export_entries; expired ones come back as stale."""
+        for key, value, ttl in entries:
+            if ttl > -self.stale_window:
+                self.set(key, value, ttl)
+
+    async def get_or_load(self, key, loader, ttl, negative_ttl):
+        """Return the cached value for key, calling loader() on a miss.
+
+        Empty results are cached for negative_ttl. Exceptions raised by the
+        loader propagate and nothing is stored.
+        """
+        found, value, is_stale = self.get(key)
+        if found:
+            if is_stale:
+                self.stale_hits += 1
+                self._schedule_refresh(key, loader, ttl, negative_ttl)
+            else:
+                self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await loader()
+        self.set(key, value, ttl if value else negative_ttl)
+        return value
+
+    def _schedule_refresh(self, key, loader, ttl, negative_ttl):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, loader, ttl, negative_ttl))
+        self._refreshing[key] = task
+
+    async def _refresh(self, key, loader, ttl, negative_ttl):
+        try:
+            value = await loader()
+            self.set(key, value, ttl if value else negative_ttl)
+            self.refreshes += 1
+        except Exception as e:
+            # Keep serving the stale entry until it falls out of the window
+            self.refresh_errors += 1
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def stats(self):
+        """Return counters useful for sizing the cache."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import sqlite3
+import string
+import time
+from services.models import Drink
+import logging
+
+logger = logging.getLogger(__name__)
+
+# First-letter keys that together cover the whole TheCocktailDB catalog
+CATALOG_LETTERS = string.ascii_lowercase + string.digits
+
+# Bump when the snapshot schema changes; older files are ignored
+SNAPSHOT_FORMAT_VERSION = 2
+
+class Catalog:
+    """In-memory view of a catalog snapshot as Drink records keyed by idDrink."""
+
+    def __init__(self, drinks, created_at=None):
+        self.created_at = created_at or time.time()
+        self.drinks = {}
+        for drink in drinks:
+            self.drinks[drink.id] = drink
+        # Sorted by name so letter and name results come back in a stable order
+        self._ordered = sorted(self.drinks.values(), key=lambda d: d.name.lower())
+        self._ids = [drink.id for drink in self._ordered]
+        self._names = [drink.name.lower() for drink in self._ordered]
+
+    def __len__(self):
+        return len(self.drinks)
+
+    def ordered(self):
+        """Return all drinks sorted by name."""
+        return self._ordered
+
+    def get(self, drink_id):
+        return self.drinks.get(str(drink_id))
+
+    def search_name(self, query: str):
+        """Return drinks whose name contains query, like search.php?s= does."""
+        needle = query.strip().lower().replace('_', ' ')
+        return [
+            self._ordered[i] for i, name in enumerate(self._names)
+            if needle in name
+        ] or None
+
+    def search_letter(self, letter: str):
+        """Return drinks whose name starts with letter, like search.php?f= does."""
+        first = letter.strip().lower()[:1]
+        return [
+            self._ordered[i] for i, name in enumerate(self._names)
+            if name.startswith(first)
+        ] or None
+
+    def random(self):
+        if not self._ids:
+            return None
+        return self.drinks[random.choice(self._ids)]
+
+def save_snapshot(path: str, drinks):
+    """Write drinks to a versioned snapshot, replacing any previous one in a single transaction.
+
+    The snapshot lives in its own tables so it can share a database file
+    with the bot's other persistent state.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS catalog_meta")
+            conn.execute("DROP TABLE IF EXISTS catalog_drinks")
+            conn.execute("CREATE TABLE catalog_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE catalog_drinks (id TEXT PRIMARY KEY, name TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO catalog_drinks (id, name, data) VALUES (?, ?, ?)",
+                [
+                    (drink['idDrink'], drink['strDrink'], json.dumps(drink, separators=(',', ':')))
+                    for drink in drinks
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO catalog_meta (key, value) VALUES (?, ?)",
+                [
+                    ('format_version', str(SNAPSHOT_FORMAT_VERSION)),
+                    ('created_at', str(time.time())),
+                    ('drink_count', str(len(drinks))),
+                ]
+            )
+    finally:
+        conn.close()
+    logger.info(f"Saved catalog snapshot with {len(drinks)} drinks to {path}")
+
+def snapshot_created_at(path: str):
+    """Return when the snapshot in path was created, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'created_at'").fetchone()
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    return float(row[0]) if row else None
+
+def load_snapshot(path: str):
+    """Load a catalog snapshot, returning None if it is missing or outdated."""
+    if not os.path.exists(path):
+        logger.warning(f"Catalog snapshot not found: {path}")
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_meta'"
+        ).fetchone() is None:
+            logger.warning(f"No catalog snapshot in {path}")
+            return None
+        meta = dict(conn.execute("SELECT key, value FROM catalog_meta").fetchall())
+        if int(meta.get('format_version', 0)) != SNAPSHOT_FORMAT_VERSION:
+            logger.warning(f"Ignoring catalog snapshot with format {meta.get('format_version')}")
+            return None
+        drinks = [Drink.from_api(json.loads(row[0])) for row in conn.execute("SELECT data FROM catalog_drinks")]
+    except sqlite3.DatabaseError as e:
+        logger.error(f"Error reading catalog snapshot: {e}")
+        return None
+    finally:
+        conn.close()
+    catalog = Catalog(drinks, created_at=float(meta.get('created_at', 0)))
+    logger.info(f"Loaded catalog snapshot with {len(catalog)} drinks from {path}")
+    return catalog
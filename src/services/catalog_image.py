@@ -0,0 +1,325 @@
+import functools
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from collections.abc import Mapping, Sequence
+from services.fulltext import FullTextIndex
+from services.ingredient_index import IngredientIndex
+from services.models import Drink
+from services.name_index import NameIndex
+from services.prefix_index import PrefixIndex
+from services.similarity import SimilarityIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Catalog images are plain arrays in native byte order, so they are built on the
+# host that maps them; a foreign byte order shows up as a version mismatch
+IMAGE_MAGIC = b'CTLGIMG\0'
+IMAGE_FORMAT_VERSION = 4
+
+_HEADER = struct.Struct('=8sIId')  # magic, version, section count, snapshot created_at
+_SECTION = struct.Struct('=16sc7xqq')  # name, array typecode, offset, length in bytes
+_SECTION_NAME_SIZE = 16
+_ALIGNMENT = 8
+
+class StringTable(Sequence):
+    """Read-only sequence of UTF-8 strings stored as an offsets array and one blob."""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets  # len(self) + 1 positions into data
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+class PostingsTable:
+    """Read-only mapping of sorted string keys to slices of one flat integer array."""
+
+    def __init__(self, keys, offsets, values):
+        self._keys = keys
+        self._offsets = offsets  # len(keys) + 1 positions into values
+        self._values = values
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return self._keys
+
+    def get(self, key, default=None):
+        position = bisect_left(self._keys, key)
+        if position == len(self._keys) or self._keys[position] != key:
+            return default
+        return self._values[self._offsets[position]:self._offsets[position + 1]]
+
+class _OrderedDrinks(Sequence):
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._catalog._drink(index)
+
+class _DrinkMapping(Mapping):
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __iter__(self):
+        return (str(drink_id) for drink_id in self._catalog._ids)
+
+    def __getitem__(self, drink_id):
+        drink = self._catalog.get(drink_id)
+        if drink is None:
+            raise KeyError(drink_id)
+        return drink
+
+class MappedCatalog:
+    """Catalog backed by a catalog image.
+
+    Offers the same lookups as Catalog, but drinks stay serialized in the
+    mapped file and are decoded on access; the most recently used ones are
+    kept decoded.
+    """
+
+    def __init__(self, created_at, ids, names, data, sorted_ids, id_positions, cache_size=1024):
+        self.created_at = created_at
+        self._ids = ids  # drink ID per position, positions in name order
+        self._names = names  # lower-cased drink names per position
+        self._data = data  # drink JSON per position
+        self._sorted_ids = sorted_ids
+        self._id_positions = id_positions  # position of each of the sorted IDs
+        self._drink = functools.lru_cache(maxsize=cache_size)(self._decode)
+        self.drinks = _DrinkMapping(self)
+
+    def _decode(self, position):
+        return Drink.from_api(json.loads(self._data[position]))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ordered(self):
+        """Return all drinks sorted by name."""
+        return _OrderedDrinks(self)
+
+    def get(self, drink_id):
+        try:
+            drink_id = int(drink_id)
+        except (TypeError, ValueError):
+            return None
+        index = bisect_left(self._sorted_ids, drink_id)
+        if index == len(self._sorted_ids) or self._sorted_ids[index] != drink_id:
+            return None
+        return self._drink(self._id_positions[index])
+
+    def search_name(self, query: str):
+        """Return drinks whose name contains query, like search.php?s= does."""
+        needle = query.strip().lower().replace('_', ' ')
+        return [
+            self._drink(i) for i, name in enumerate(self._names)
+            if needle in name
+        ] or None
+
+    def search_letter(self, letter: str):
+        """Return drinks whose name starts with letter, like search.php?f= does."""
+        first = letter.strip().lower()[:1]
+        start = bisect_left(self._names, first)
+        stop = bisect_left(self._names, first + '\U0010ffff', start) if first else len(self._names)
+        return [self._drink(i) for i in range(start, stop)] or None
+
+    def random(self):
+        if not self._ids:
+            return None
+        return self._drink(random.randrange(len(self._ids)))
+
+class CatalogImage:
+    """A memory-mapped catalog image: the catalog and all its indexes.
+
+    Opening one only reads the section directory; every array is a view of
+    the read-only mapping, so processes mapping the same file share its
+    pages and loading costs the same for any catalog size.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError("truncated catalog image")
+        magic, version, count, self.created_at = _HEADER.unpack_from(self._mmap, 0)
+        if magic != IMAGE_MAGIC or version != IMAGE_FORMAT_VERSION:
+            raise ValueError(f"unsupported catalog image (format {version})")
+        view = memoryview(self._mmap)
+        self._sections = {}
+        for i in range(count):
+            name, typecode, offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+            if offset + length > len(self._mmap):
+                raise ValueError("truncated catalog image")
+            self._sections[name.rstrip(b'\0').decode()] = view[offset:offset + length].cast(typecode.decode())
+
+        self.catalog = MappedCatalog(
+            self.created_at, self._array('drink_ids'), self._strings('drink_names'),
+            self._strings('drink_data'), self._array('sorted_ids'), self._array('id_positions')
+        )
+        self.ingredient_index = IngredientIndex.from_postings(self._postings('ingredients'))
+        self.name_index = NameIndex.from_arrays(
+            self._strings('fuzzy_names'), self._array('fuzzy_ids'), self._array('fuzzy_grams'),
+            self._postings('trigrams')
+        )
+        self.prefix_index = PrefixIndex.from_arrays(
+            self._strings('prefix_keys'), self._array('prefix_ids'), self._strings('prefix_names')
+        )
+        self.browse_index = PrefixIndex.from_arrays(
+            self._strings('browse_keys'), self._array('browse_ids'), self._strings('browse_names')
+        )
+        self.similarity_index = SimilarityIndex.from_arrays(self._array('similar_ids'), self._array('similar_drinks'))
+        terms = self._postings('fulltext')
+        self.fulltext_index = FullTextIndex.from_arrays(
+            terms, PostingsTable(terms.keys(), self._array('fulltext.o'), self._array('fulltext_counts')),
+            self._array('fulltext_docs'), self._array('fulltext_crcs'), self._array('fulltext_lengths'),
+            self._array('fulltext_total')[0]
+        )
+
+    def _array(self, name):
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise ValueError(f"catalog image has no {name} section") from None
+
+    def _strings(self, name):
+        return StringTable(self._array(f'{name}.o'), self._array(f'{name}.s'))
+
+    def _postings(self, name):
+        return PostingsTable(self._strings(f'{name}.k'), self._array(f'{name}.o'), self._array(f'{name}.v'))
+
+def open_catalog_image(path: str):
+    """Map a catalog image, returning None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        image = CatalogImage(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring catalog image {path}: {e}")
+        return None
+    logger.info(f"Mapped catalog image with {len(image.catalog)} drinks from {path}")
+    return image
+
+def _string_sections(name, strings):
+    offsets = array('q', [0])
+    data = bytearray()
+    for value in strings:
+        data += value.encode('utf-8')
+        offsets.append(len(data))
+    return [(f'{name}.o', 'q', offsets.tobytes()), (f'{name}.s', 'B', bytes(data))]
+
+def _postings_sections(name, postings):
+    keys = sorted(postings.keys())
+    offsets = array('q', [0])
+    values = array('q')
+    for key in keys:
+        values.extend(array('q', postings.get(key)))
+        offsets.append(len(values))
+    return (
+        _string_sections(f'{name}.k', keys)
+        + [(f'{name}.o', 'q', offsets.tobytes()), (f'{name}.v', 'q', values.tobytes())]
+    )
+
+def write_catalog_image(path: str, catalog, ingredient_index, name_index, prefix_index, browse_index,
+                        similarity_index, fulltext_index):
+    """Write a catalog and its indexes as a catalog image, atomically replacing any previous one.
+
+    Processes that still map the old file keep reading it until they reopen.
+    """
+    drinks = catalog.ordered()
+    ids = array('q', (int(drink.id) for drink in drinks))
+    id_positions = array('q', sorted(range(len(ids)), key=ids.__getitem__))
+    sorted_ids = array('q', (ids[position] for position in id_positions))
+
+    sections = [
+        ('drink_ids', 'q', ids.tobytes()),
+        ('sorted_ids', 'q', sorted_ids.tobytes()),
+        ('id_positions', 'q', id_positions.tobytes()),
+    ]
+    sections += _string_sections('drink_names', (drink.name.lower() for drink in drinks))
+    sections += _string_sections(
+        'drink_data', (json.dumps(drink.to_api(), separators=(',', ':')) for drink in drinks)
+    )
+    sections += _postings_sections('ingredients', ingredient_index.postings())
+
+    names, name_ids, gram_counts, trigrams = name_index.arrays()
+    sections += _string_sections('fuzzy_names', names)
+    sections += [('fuzzy_ids', 'q', array('q', name_ids).tobytes()), ('fuzzy_grams', 'H', gram_counts.tobytes())]
+    sections += _postings_sections('trigrams', trigrams)
+
+    for name, index in (('prefix', prefix_index), ('browse', browse_index)):
+        keys, index_ids, display_names = index.arrays()
+        sections += _string_sections(f'{name}_keys', keys)
+        sections += [(f'{name}_ids', 'q', array('q', index_ids).tobytes())]
+        sections += _string_sections(f'{name}_names', display_names)
+
+    similar_ids, similar_drinks = similarity_index.arrays()
+    sections += [('similar_ids', 'q', similar_ids.tobytes()), ('similar_drinks', 'q', similar_drinks.tobytes())]
+
+    # Term counts share the keys and offsets of the drink ID postings
+    term_ids, term_counts, doc_ids, doc_checksums, doc_lengths, total_length = fulltext_index.arrays()
+    counts = array('I', chain.from_iterable(term_counts.get(term) for term in sorted(term_ids.keys())))
+    sections += _postings_sections('fulltext', term_ids)
+    sections += [
+        ('fulltext_counts', 'I', counts.tobytes()),
+        ('fulltext_docs', 'q', doc_ids.tobytes()),
+        ('fulltext_crcs', 'I', doc_checksums.tobytes()),
+        ('fulltext_lengths', 'I', doc_lengths.tobytes()),
+        ('fulltext_total', 'q', array('q', [total_length]).tobytes()),
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    offset = _HEADER.size + len(sections) * _SECTION.size
+    entries = []
+    for name, typecode, data in sections:
+        # struct would silently truncate a longer name and the section could not be found
+        if len(name.encode()) > _SECTION_NAME_SIZE:
+            raise ValueError(f"catalog image section name {name!r} is longer than {_SECTION_NAME_SIZE} bytes")
+        offset += -offset % _ALIGNMENT
+        entries.append((name, typecode, offset, data))
+        offset += len(data)
+
+    # A temp file of its own, so processes rebuilding the image at once don't write into each other's
+    fd, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=directory or '.')
+    try:
+        with open(fd, 'wb') as f:
+            f.write(_HEADER.pack(IMAGE_MAGIC, IMAGE_FORMAT_VERSION, len(entries), catalog.created_at))
+            for name, typecode, offset, data in entries:
+                f.write(_SECTION.pack(name.encode(), typecode.encode(), offset, len(data)))
+            for name, typecode, offset, data in entries:
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    logger.info(f"Wrote catalog image with {len(ids)} drinks to {path}")
@@ -0,0 +1,86 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker.
+
+    Consecutive failures (or calls slower than slow_call_seconds) open the
+    circuit; while open, allow() returns False so callers fail fast. After
+    reset_timeout the circuit is half-open and lets half_open_max_calls probe
+    requests through: a successful probe closes it, a failed one opens it
+    again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=None, reset_timeout=30.0,
+                 half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Return whether a call may go through, counting half-open probes."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit for {self.name} is half-open, probing")
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def record_success(self, latency):
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        if self.state == self.HALF_OPEN:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def release(self):
+        """Forget a call that was allowed but abandoned without a result."""
+        if self.state == self.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def _open(self):
+        if self.state != self.OPEN:
+            self.times_opened += 1
+            logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            'open': self.state == self.OPEN,
+            'half_open': self.state == self.HALF_OPEN,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
@@ -1,60 +1,712 @@
-import requests
+import asyncio
+import sqlite3
+import time
+from contextvars import ContextVar
+import httpx
+from services import metrics
+from services.cache import ResponseCache
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.singleflight import SingleFlight
+from services.catalog import CATALOG_LETTERS, load_snapshot, save_snapshot, snapshot_created_at
+from services.ingredient_catalog import load_ingredients, save_ingredients
+from services.ingredient_index import IngredientIndex, parse_ingredient_list
+from services.name_index import NameIndex, normalize_name
+from services.prefix_index import PrefixIndex
+from services.random_pool import RandomPool
+from services.models import Drink, parse_drinks
 from config.settings import (
-    COCKTAIL_API_URL, 
-    COCKTAIL_SEARCH_API_URL, 
+    COCKTAIL_API_URL,
+    COCKTAIL_SEARCH_API_URL,
     COCKTAIL_LETTER_SEARCH_API_URL,
     INGREDIENT_SEARCH_API_URL,
-    DRINKS_BY_INGREDIENT_API_URL  # Add this import
+    INGREDIENT_LIST_API_URL,
+    DRINKS_BY_INGREDIENT_API_URL,
+    COCKTAIL_LOOKUP_API_URL,
+    REQUEST_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_CONCURRENT_REQUESTS,
+    ENDPOINT_TIMEOUTS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_RESET_TIMEOUT,
+    HEDGE_REQUESTS,
+    HEDGE_MIN_SAMPLES,
+    CACHE_MAX_ENTRIES,
+    CACHE_STALE_WINDOW,
+    CACHE_NEGATIVE_TTL,
+    CACHE_TTLS,
+    CATALOG_MODE,
+    CATALOG_SNAPSHOT_PATH,
+    CATALOG_IMAGE_PATH,
+    INGREDIENT_DB_PATH,
+    INGREDIENT_REFRESH_INTERVAL,
+    INGREDIENT_REFRESH_RETRY,
+    INGREDIENT_WARM_CONCURRENCY,
+    FUZZY_MIN_SCORE,
+    FUZZY_AUTO_MATCH_SCORE,
+    FUZZY_SUGGESTION_LIMIT,
+    INLINE_MAX_RESULTS,
+    INLINE_MIN_UPSTREAM_QUERY,
+    RANDOM_POOL_SIZE,
+    RANDOM_POOL_LOW_WATER,
+    RANDOM_POOL_REFILL_CONCURRENCY,
+    RANDOM_HISTORY_SIZE,
+    SIMILAR_DRINKS_COUNT,
+    PANTRY_MAX_MISSING,
+    PANTRY_RESULTS_PER_GROUP,
+    FULLTEXT_DB_PATH,
+    FULLTEXT_RESULT_LIMIT
 )
 import logging
 
 logger = logging.getLogger(__name__)
 
-REQUEST_TIMEOUT = 10
+# Shared keep-alive connection pool, opened in the application's post_init hook
+_client = None
+_request_semaphore = None
 
-def get_random_cocktail():
+response_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES, stale_window=CACHE_STALE_WINDOW)
+
+# Identical requests in flight at the same time share one upstream call
+_inflight_requests = SingleFlight()
+
+# Local catalog snapshot and the indexes built from it, loaded at startup
+_catalog = None
+_ingredient_index = None
+_name_index = None
+_prefix_index = None
+_browse_index = None
+_similarity_index = None
+_pantry_matcher = None
+_fulltext_index = None
+
+# Prefetched ingredient details and the task that refreshes them
+_ingredient_catalog = None
+_ingredient_refresh_task = None
+
+# Prefetched random drinks, started in the application's post_init hook
+_random_pool = None
+
+# Circuit breakers per endpoint, created on first use
+_breakers = {}
+
+# Set when the current update was answered from stale cache or snapshot data;
+# every update runs in its own task, so the flag never leaks between updates
+_served_stale = ContextVar('served_stale', default=False)
+
+async def init_http_client():
+    """Open the shared HTTP client used for all TheCocktailDB requests."""
+    global _client, _request_semaphore
+    if _client is not None:
+        return
+    _client = httpx.AsyncClient(
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+    _request_semaphore = asyncio.Semaphore(HTTP_MAX_CONCURRENT_REQUESTS)
+    logger.info("HTTP client initialized")
+
+async def close_http_client():
+    """Close the shared HTTP client and release pooled connections."""
+    global _client, _request_semaphore
+    if _client is None:
+        return
+    await _client.aclose()
+    _client = None
+    _request_semaphore = None
+    logger.info("HTTP client closed")
+
+async def _get_json(endpoint: str, url: str, coalesce: bool = True):
+    """GET a URL through the shared pool with the endpoint's timeout.
+
+    Concurrent calls for the same URL are coalesced into a single request
+    unless coalesce is False (e.g. for random.php, where each caller
+    expects a different answer).
+    """
+    if not coalesce:
+        return await _fetch_json(endpoint, url)
+    return await _inflight_requests.do(url, lambda: _fetch_json(endpoint, url))
+
+async def _fetch_json(endpoint: str, url: str):
+    """GET a URL through the endpoint's circuit breaker, hedging slow requests if enabled."""
+    if _client is None:
+        # Allows the service to be used outside of the bot application
+        await init_http_client()
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(
+            endpoint,
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS,
+            reset_timeout=CIRCUIT_RESET_TIMEOUT
+        )
+    if not breaker.allow():
+        metrics.increment('cocktaildb_errors_total', (('endpoint', endpoint), ('kind', 'circuit_open')))
+        raise CircuitOpenError(f"Circuit for {endpoint} is open")
+
+    start = time.perf_counter()
+    try:
+        if HEDGE_REQUESTS:
+            data = await _hedged_request(endpoint, url)
+        else:
+            data = await _request(endpoint, url)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success(time.perf_counter() - start)
+    return data
+
+async def _request(endpoint: str, url: str):
+    timeout = ENDPOINT_TIMEOUTS.get(endpoint, REQUEST_TIMEOUT)
+    labels = (('endpoint', endpoint),)
+    async with _request_semaphore:
+        start = time.perf_counter()
+        try:
+            response = await _client.get(url, timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT))
+            response.raise_for_status()
+            data = response.json()
+        except asyncio.CancelledError:
+            # Hedged requests that lost the race are cancelled and not observed
+            raise
+        except Exception as e:
+            metrics.increment('cocktaildb_errors_total', labels + (('kind', _error_kind(e)),))
+            metrics.observe('cocktaildb_request_seconds', labels, time.perf_counter() - start)
+            raise
+        metrics.observe('cocktaildb_request_seconds', labels, time.perf_counter() - start)
+    return data
+
+def _error_kind(error):
+    if isinstance(error, httpx.TimeoutException):
+        return 'timeout'
+    if isinstance(error, httpx.HTTPStatusError):
+        return 'status'
+    if isinstance(error, httpx.HTTPError):
+        return 'transport'
+    if isinstance(error, ValueError):
+        return 'invalid_json'
+    return 'other'
+
+def _hedge_delay(endpoint: str):
+    """Return the endpoint's observed p95 latency, or None until there are enough samples."""
+    histogram = metrics.get_histogram('cocktaildb_request_seconds', (('endpoint', endpoint),))
+    if histogram is None or histogram.count < HEDGE_MIN_SAMPLES:
+        return None
+    return histogram.quantile(0.95)
+
+async def _hedged_request(endpoint: str, url: str):
+    """Start a second request if the first is slower than p95 and return whichever answers first."""
+    delay = _hedge_delay(endpoint)
+    if delay is None:
+        return await _request(endpoint, url)
+
+    pending = {asyncio.ensure_future(_request(endpoint, url))}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            metrics.increment('cocktaildb_hedged_requests_total', (('endpoint', endpoint),))
+            pending.add(asyncio.ensure_future(_request(endpoint, url)))
+        error = None
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+def load_catalog(path: str = CATALOG_SNAPSHOT_PATH, image_path: str = CATALOG_IMAGE_PATH):
+    """Load the local catalog and its indexes so lookups can be served without upstream calls.
+
+    With an image path the memory-mapped catalog image is used, rebuilt
+    first if the snapshot is newer; without one the snapshot is parsed and
+    indexed in this process.
+    """
+    global _catalog, _ingredient_index, _name_index, _prefix_index, _browse_index, _similarity_index
+    global _pantry_matcher, _fulltext_index
+    image = prepare_catalog_image(path, image_path) if image_path else None
+    if image is not None:
+        from services.pantry import PantryMatcher
+        _catalog = image.catalog
+        _ingredient_index = image.ingredient_index
+        _name_index = image.name_index
+        _prefix_index = image.prefix_index
+        _browse_index = image.browse_index
+        _similarity_index = image.similarity_index
+        _fulltext_index = image.fulltext_index
+        _pantry_matcher = PantryMatcher(_ingredient_index.postings())
+        return _catalog
+    _catalog = load_snapshot(path)
+    if _catalog:
+        from services.pantry import PantryMatcher
+        _ingredient_index, _name_index, _prefix_index, _browse_index, _similarity_index = _build_indexes(_catalog)
+        _pantry_matcher = PantryMatcher(_ingredient_index.postings())
+        logger.info(f"Indexed {len(_ingredient_index)} ingredients and {len(_name_index)} names")
+        _fulltext_index = sync_fulltext_index(_catalog)
+    else:
+        _ingredient_index = None
+        _name_index = None
+        _prefix_index = None
+        _browse_index = None
+        _similarity_index = None
+        _pantry_matcher = None
+        _fulltext_index = None
+    return _catalog
+
+def sync_fulltext_index(catalog, path: str = FULLTEXT_DB_PATH):
+    """Load the stored full-text index and bring it in line with catalog.
+
+    A store last synced with this catalog is used as is; otherwise only the
+    drinks whose text changed are re-tokenized, and only their documents and
+    terms are written back.
+    """
+    from services.fulltext import FullTextIndex, load_fulltext, save_fulltext
+    stored = load_fulltext(path)
+    index, synced_at = stored if stored else (FullTextIndex(), None)
+    if synced_at != catalog.created_at:
+        changed, removed, terms = index.sync(catalog.drinks.values())
+        try:
+            save_fulltext(path, index, changed, removed, terms, catalog.created_at)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error saving full-text index: {e}")
+    return index
+
+def _build_indexes(catalog):
+    from services.similarity import SimilarityIndex
+    drinks = catalog.drinks.values()
+    return (
+        IngredientIndex(drinks),
+        NameIndex(_iter_drink_names(drinks)),
+        PrefixIndex(_iter_drink_names(drinks), words=True),
+        PrefixIndex((drink.id, drink.name) for drink in drinks),
+        SimilarityIndex(drinks, k=SIMILAR_DRINKS_COUNT)
+    )
+
+def prepare_catalog_image(path: str = CATALOG_SNAPSHOT_PATH, image_path: str = CATALOG_IMAGE_PATH):
+    """Map the catalog image, first rebuilding it from the snapshot if that is newer.
+
+    Returns None when there is neither an image nor a snapshot to build one from.
+    """
+    from services.catalog_image import open_catalog_image, write_catalog_image
+    from services.fulltext import FullTextIndex, load_fulltext
+    image = open_catalog_image(image_path)
+    created_at = snapshot_created_at(path)
+    if created_at is not None and (image is None or image.created_at < created_at):
+        catalog = load_snapshot(path)
+        if catalog:
+            # The previous image's postings are reused and only changed drinks re-tokenized
+            if image is not None:
+                fulltext_index = FullTextIndex.from_arrays(*image.fulltext_index.arrays())
+            else:
+                stored = load_fulltext(FULLTEXT_DB_PATH)
+                fulltext_index = stored[0] if stored else FullTextIndex()
+            fulltext_index.sync(catalog.drinks.values())
+            try:
+                write_catalog_image(image_path, catalog, *_build_indexes(catalog), fulltext_index)
+            except OSError as e:
+                logger.error(f"Error writing catalog image: {e}")
+                return image
+            image = open_catalog_image(image_path)
+    return image
+
+def _iter_drink_names(drinks):
+    for drink in drinks:
+        yield drink.id, drink.name
+        if drink.alternate_name:
+            yield drink.id, drink.alternate_name
+
+def get_catalog():
+    return _catalog
+
+def _snapshot_catalog():
+    """Return the catalog if lookups should be answered from the snapshot."""
+    if CATALOG_MODE == 'snapshot':
+        return _catalog
+    return None
+
+async def warm_catalog(path: str = CATALOG_SNAPSHOT_PATH):
+    """Crawl every first-letter endpoint concurrently and write a catalog snapshot."""
+    async def fetch_letter(letter):
+        url = COCKTAIL_LETTER_SEARCH_API_URL.format(letter=letter)
+        data = await _get_json('letter', url)
+        return data.get('drinks') or []
+
+    # Any failed letter aborts the crawl so a partial catalog never replaces a good one
+    results = await asyncio.gather(*(fetch_letter(letter) for letter in CATALOG_LETTERS))
+    drinks = {}
+    for letter_drinks in results:
+        for drink in letter_drinks:
+            drinks[drink['idDrink']] = drink
+    save_snapshot(path, list(drinks.values()))
+    return len(drinks)
+
+async def _cached(endpoint: str, key: str, loader, fallback=None):
+    """Serve an endpoint lookup from the response cache, loading it on a miss.
+
+    When the upstream call fails or its circuit is open, the last cached
+    value is served regardless of age, then fallback() (usually the local
+    snapshot); either way the answer is flagged with served_stale().
+    """
+    try:
+        return await response_cache.get_or_load(
+            (endpoint, key), loader, CACHE_TTLS[endpoint], CACHE_NEGATIVE_TTL
+        )
+    except Exception as e:
+        found, value = response_cache.get_fallback((endpoint, key))
+        if not found and fallback is not None:
+            value = fallback()
+            found = value is not None
+        if not found:
+            raise
+        logger.warning(f"Serving stale {endpoint} result for {key}: {e}")
+        _mark_stale(endpoint)
+        return value
+
+def _mark_stale(endpoint: str):
+    _served_stale.set(True)
+    metrics.increment('cocktaildb_degraded_responses_total', (('endpoint', endpoint),))
+
+def served_stale():
+    """Return whether a lookup in the current update was answered from stale data."""
+    return _served_stale.get()
+
+def get_circuit_stats():
+    """Return circuit breaker state per endpoint."""
+    return {endpoint: breaker.stats() for endpoint, breaker in _breakers.items()}
+
+def get_cache_stats():
+    """Return hit, miss and eviction counters of the response cache."""
+    return response_cache.stats()
+
+def export_response_cache():
+    """Return the response cache as JSON-serializable data for the persistence store."""
+    entries = []
+    for (endpoint, key), value, ttl in response_cache.export_entries():
+        if isinstance(value, Drink):
+            value = {'drink': value.to_api()}
+        elif value is not None:
+            value = {'drinks': [drink.to_api() for drink in value]}
+        entries.append([endpoint, key, value, ttl])
+    return {'saved_at': time.time(), 'entries': entries}
+
+def import_response_cache(data):
+    """Restore the response cache from export_response_cache() output."""
+    if not data:
+        return
+    elapsed = max(0.0, time.time() - data.get('saved_at', 0))
+    entries = []
+    for endpoint, key, value, ttl in data.get('entries', []):
+        if value is not None:
+            value = Drink.from_api(value['drink']) if 'drink' in value else parse_drinks(value['drinks'])
+        entries.append(((endpoint, key), value, ttl - elapsed))
+    response_cache.import_entries(entries)
+    logger.info(f"Restored {len(response_cache)} response cache entries")
+
+def get_coalescing_stats():
+    """Return how many upstream requests were executed and how many were deduplicated."""
+    return _inflight_requests.stats()
+
+def start_random_pool():
+    """Start prefetching random drinks in the background."""
+    global _random_pool
+    if _random_pool is not None:
+        return
+    _random_pool = RandomPool(
+        _fetch_random_cocktail,
+        fallback=lambda: _catalog.random() if _catalog else None,
+        size=RANDOM_POOL_SIZE,
+        low_water=RANDOM_POOL_LOW_WATER,
+        history_size=RANDOM_HISTORY_SIZE,
+        refill_concurrency=RANDOM_POOL_REFILL_CONCURRENCY
+    )
+    _random_pool.start()
+
+async def stop_random_pool():
+    global _random_pool
+    if _random_pool is not None:
+        await _random_pool.stop()
+        _random_pool = None
+
+def get_random_pool_stats():
+    return _random_pool.stats() if _random_pool is not None else {}
+
+async def get_random_cocktail(user_id=None):
+    """Return a random drink, avoiding drinks recently shown to user_id."""
+    catalog = _snapshot_catalog()
+    if catalog:
+        return catalog.random()
+    if _random_pool is not None:
+        drink = _random_pool.take(user_id)
+        if drink is not None:
+            return drink
+    drink = await _fetch_random_cocktail()
+    if drink is None and _catalog:
+        _mark_stale('random')
+        return _catalog.random()
+    return drink
+
+async def _fetch_random_cocktail():
     try:
-        response = requests.get(f"https://{COCKTAIL_API_URL}", timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        data = await _get_json('random', COCKTAIL_API_URL, coalesce=False)
         if not data or not data.get('drinks'):
             return None
-        return data['drinks'][0]
+        return Drink.from_api(data['drinks'][0])
     except Exception as e:
         logger.error(f"Error fetching random cocktail: {e}")
         return None
 
-def search_cocktail(query: str):
+async def search_cocktail(query: str):
+    catalog = _snapshot_catalog()
+    if catalog:
+        return catalog.search_name(query)
     try:
-        url = f"https://{COCKTAIL_SEARCH_API_URL.format(query=query.replace(' ', '_'))}"
-        logger.info(f"Search URL: {url}")
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('drinks')
+        key = query.strip().lower().replace(' ', '_')
+
+        async def load():
+            url = COCKTAIL_SEARCH_API_URL.format(query=key)
+            logger.info(f"Search URL: {url}")
+            data = await _get_json('search', url)
+            return parse_drinks(data.get('drinks'))
+
+        return await _cached('search', key, load, lambda: _catalog.search_name(query) if _catalog else None)
     except Exception as e:
         logger.error(f"Error searching cocktail: {e}")
         return None
 
-def search_cocktail_by_letter(letter: str):
+async def search_cocktail_by_letter(letter: str):
+    catalog = _snapshot_catalog()
+    if catalog:
+        return catalog.search_letter(letter)
     try:
-        url = f"https://{COCKTAIL_LETTER_SEARCH_API_URL.format(letter=letter)}"
-        logger.info(f"Letter search URL: {url}")
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('drinks')
+        key = letter.strip().lower()
+
+        async def load():
+            url = COCKTAIL_LETTER_SEARCH_API_URL.format(letter=key)
+            logger.info(f"Letter search URL: {url}")
+            data = await _get_json('letter', url)
+            return parse_drinks(data.get('drinks'))
+
+        return await _cached('letter', key, load, lambda: _catalog.search_letter(key) if _catalog else None)
     except Exception as e:
         logger.error(f"Error searching by letter: {e}")
         return None
 
-def search_ingredient(ingredient: str):
+async def browse_drinks(prefix: str, page: int, page_size: int):
+    """Return ([(drink_id, name)], total) for one page of drinks whose name starts with prefix.
+
+    With a local catalog a page is two bisects and a slice of the sorted
+    name array; otherwise the first-letter search is fetched (cached) and
+    filtered.
+    """
+    if _browse_index is not None:
+        start, stop = _browse_index.range(prefix)
+        first = start + page * page_size
+        return _browse_index.entries(first, min(first + page_size, stop)), stop - start
+
+    normalized = normalize_name(prefix)
+    drinks = await search_cocktail_by_letter(normalized[:1]) if normalized else None
+    entries = sorted(
+        ((int(drink.id), drink.name) for drink in drinks or () if normalize_name(drink.name).startswith(normalized)),
+        key=lambda entry: normalize_name(entry[1])
+    )
+    return entries[page * page_size:(page + 1) * page_size], len(entries)
+
+async def find_cocktails(query: str):
+    """Search by name, falling back to typo-tolerant matching on the local index.
+
+    Returns (drinks, suggestions) where suggestions is a list of catalog drinks
+    to offer as "did you mean" choices when nothing matched confidently.
+    Names missing from the local catalog never cost an upstream round trip.
+    """
+    if _name_index is None or _catalog.search_name(query):
+        return await search_cocktail(query), []
+
+    matches = _name_index.search(query, limit=FUZZY_SUGGESTION_LIMIT, min_score=FUZZY_MIN_SCORE)
+    confident = [_catalog.get(drink_id) for score, drink_id in matches if score >= FUZZY_AUTO_MATCH_SCORE]
+    if confident:
+        return confident, []
+    return None, [_catalog.get(drink_id) for score, drink_id in matches]
+
+async def find_inline_drinks(query: str, offset: int, limit: int):
+    """Return (drinks, next_offset) for an inline query.
+
+    Answered from the local prefix index: names starting with the query come
+    first, then names with a word starting with it, then typo-tolerant
+    matches. Without a catalog only queries of INLINE_MIN_UPSTREAM_QUERY
+    characters or more go upstream (through the response cache), so most
+    keystrokes cost nothing.
+    """
+    normalized = normalize_name(query)
+    if _prefix_index is not None:
+        if not normalized:
+            drinks = _catalog.ordered()[:INLINE_MAX_RESULTS]
+        else:
+            drinks = [_catalog.get(drink_id) for drink_id in _prefix_index.lookup(normalized, INLINE_MAX_RESULTS)]
+            # Stable sort keeps name order within each group
+            drinks.sort(key=lambda drink: not normalize_name(drink.name).startswith(normalized))
+            if not drinks:
+                matches = _name_index.search(normalized, limit=FUZZY_SUGGESTION_LIMIT, min_score=FUZZY_MIN_SCORE)
+                drinks = [_catalog.get(drink_id) for score, drink_id in matches]
+    elif len(normalized) >= INLINE_MIN_UPSTREAM_QUERY:
+        drinks = await search_cocktail(normalized) or []
+    else:
+        drinks = []
+
+    end = offset + limit
+    return drinks[offset:end], (end if end < len(drinks) else None)
+
+async def get_drink(drink_id: str):
+    """Return the full record for a drink ID from the catalog or lookup.php."""
+    if _catalog and _catalog.get(drink_id):
+        return _catalog.get(drink_id)
     try:
-        url = f"https://{INGREDIENT_SEARCH_API_URL.format(ingredient=ingredient.replace(' ', '_'))}"
+        key = str(int(drink_id))
+
+        async def load():
+            url = COCKTAIL_LOOKUP_API_URL.format(drink_id=key)
+            logger.info(f"Lookup URL: {url}")
+            data = await _get_json('lookup', url)
+            drinks = parse_drinks(data.get('drinks'))
+            return drinks[0] if drinks else None
+
+        return await _cached('lookup', key, load)
+    except Exception as e:
+        logger.error(f"Error looking up drink {drink_id}: {e}")
+        return None
+
+def has_similar_drinks(drink_id) -> bool:
+    return _similarity_index is not None and bool(_similarity_index.neighbours(drink_id))
+
+def get_similar_drinks(drink_id):
+    """Return the catalog drinks most similar to drink_id by ingredients, most similar first."""
+    if _similarity_index is None:
+        return []
+    return [_catalog.get(other_id) for other_id in _similarity_index.neighbours(drink_id)]
+
+def match_pantry(ingredients):
+    """Match a pantry (ingredient names) against every drink in the local catalog.
+
+    Returns (matches, totals, unknown), or None without a catalog: matches
+    are (drink, missing ingredient names) pairs, fewest missing first and at
+    most PANTRY_RESULTS_PER_GROUP per missing count; totals counts all
+    matches per missing count; unknown lists names found in no drink.
+    """
+    if _pantry_matcher is None:
+        return None
+    pantry, unknown = _pantry_matcher.pantry_mask(ingredients)
+    matches = []
+    totals = {}
+    for missing, drink_id in _pantry_matcher.match(pantry, PANTRY_MAX_MISSING):
+        totals[missing] = totals.get(missing, 0) + 1
+        if totals[missing] <= PANTRY_RESULTS_PER_GROUP:
+            missing_names = _pantry_matcher.ingredient_names(_pantry_matcher.missing(drink_id, pantry))
+            matches.append((_catalog.get(drink_id), missing_names))
+    return matches, totals, unknown
+
+def search_full_text(query: str, limit: int = FULLTEXT_RESULT_LIMIT):
+    """Return catalog drinks whose instructions, glass, category, type or tags match query, best first."""
+    if _fulltext_index is None:
+        return []
+    return [_catalog.get(drink_id) for score, drink_id in _fulltext_index.search(query, limit)]
+
+def load_ingredient_catalog(path: str = INGREDIENT_DB_PATH):
+    """Load prefetched ingredient details so ingredient lookups are served from memory."""
+    global _ingredient_catalog
+    _ingredient_catalog = load_ingredients(path)
+    return _ingredient_catalog
+
+async def warm_ingredients(path: str = INGREDIENT_DB_PATH):
+    """Fetch the ingredient list and every ingredient's details, then store and serve them."""
+    global _ingredient_catalog
+    data = await _get_json('list', INGREDIENT_LIST_API_URL)
+    names = sorted({
+        item['strIngredient1'].strip() for item in data.get('drinks') or []
+        if (item.get('strIngredient1') or '').strip()
+    })
+    semaphore = asyncio.Semaphore(INGREDIENT_WARM_CONCURRENCY)
+
+    async def fetch_details(name):
+        async with semaphore:
+            url = INGREDIENT_SEARCH_API_URL.format(ingredient=name.replace(' ', '_'))
+            details = await _get_json('ingredient', url)
+            return (details or {}).get('ingredients') or []
+
+    # Any failed lookup aborts the refresh so a partial list never replaces a good one
+    results = await asyncio.gather(*(fetch_details(name) for name in names))
+    ingredients = {}
+    for details in results:
+        for ingredient in details:
+            if ingredient.get('strIngredient'):
+                ingredients[ingredient['strIngredient'].lower()] = ingredient
+    ingredients = list(ingredients.values())
+    if not ingredients:
+        raise ValueError("TheCocktailDB returned no ingredients")
+    save_ingredients(path, ingredients)
+    _ingredient_catalog = load_ingredients(path)
+    return len(ingredients)
+
+def start_ingredient_refresh(fetch: bool = True):
+    """Refresh the ingredient details in the background whenever they are older than the interval.
+
+    With fetch=False the details are only reloaded from the store, which
+    another process keeps fresh (e.g. the first worker of a sharded bot).
+    """
+    global _ingredient_refresh_task
+    if _ingredient_refresh_task is None:
+        _ingredient_refresh_task = asyncio.create_task(_refresh_ingredients(fetch))
+
+async def stop_ingredient_refresh():
+    global _ingredient_refresh_task
+    if _ingredient_refresh_task is not None:
+        _ingredient_refresh_task.cancel()
+        try:
+            await _ingredient_refresh_task
+        except asyncio.CancelledError:
+            pass
+        _ingredient_refresh_task = None
+
+async def _refresh_ingredients(fetch):
+    while True:
+        age = time.time() - _ingredient_catalog.updated_at if _ingredient_catalog else None
+        if age is not None and age < INGREDIENT_REFRESH_INTERVAL:
+            await asyncio.sleep(INGREDIENT_REFRESH_INTERVAL - age)
+            continue
+        if not fetch:
+            await asyncio.sleep(INGREDIENT_REFRESH_RETRY)
+            load_ingredient_catalog()
+            continue
+        try:
+            count = await warm_ingredients()
+            logger.info(f"Refreshed {count} ingredients")
+        except Exception as e:
+            logger.error(f"Error refreshing ingredients: {e}")
+            await asyncio.sleep(INGREDIENT_REFRESH_RETRY)
+
+def get_ingredient_stats():
+    if _ingredient_catalog is None:
+        return {'loaded': 0}
+    return {'loaded': len(_ingredient_catalog), 'age_seconds': time.time() - _ingredient_catalog.updated_at}
+
+async def search_ingredient(ingredient: str):
+    """Return details of the named ingredient, matched case-insensitively and tolerating typos."""
+    if _ingredient_catalog:
+        match = _ingredient_catalog.search(ingredient, min_score=FUZZY_MIN_SCORE)
+        return [match] if match else None
+    try:
+        url = INGREDIENT_SEARCH_API_URL.format(ingredient=ingredient.replace(' ', '_'))
         logger.info(f"Ingredient search URL: {url}")
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        data = await _get_json('ingredient', url)
         if not data or 'ingredients' not in data or not data['ingredients']:
             return None
         return data['ingredients']
@@ -62,27 +714,51 @@ def search_ingredient(ingredient: str):
         logger.error(f"Error searching ingredient: {e}")
         return None
 
-def search_drinks_by_ingredient(ingredient: str):
+async def _search_drinks_by_single_ingredient(ingredient: str):
     try:
         # Capitalize first letter of each word as the API is case sensitive
         formatted_ingredient = ' '.join(word.capitalize() for word in ingredient.split())
-        url = f"https://{DRINKS_BY_INGREDIENT_API_URL.format(ingredient=formatted_ingredient.replace(' ', '_'))}"
-        logger.info(f"Drinks by ingredient search URL: {url}")
-        
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        
-        logger.info(f"Found {len(data.get('drinks', [])) if data and 'drinks' in data else 0} drinks")
-        
-        if not data or 'drinks' not in data or not data['drinks']:
-            logger.warning(f"No drinks found for ingredient: {formatted_ingredient}")
-            return None
-            
-        return data['drinks']
-    except requests.exceptions.RequestException as e:
+        key = formatted_ingredient.replace(' ', '_')
+
+        async def load():
+            url = DRINKS_BY_INGREDIENT_API_URL.format(ingredient=key)
+            logger.info(f"Drinks by ingredient search URL: {url}")
+
+            data = await _get_json('filter', url)
+
+            # filter.php answers unknown ingredients with a string instead of a list
+            drinks = parse_drinks(data.get('drinks')) if data else None
+            logger.info(f"Found {len(drinks) if drinks else 0} drinks")
+
+            if not drinks:
+                logger.warning(f"No drinks found for ingredient: {formatted_ingredient}")
+                return None
+
+            return drinks
+
+        return await _cached('filter', key, load)
+    except httpx.HTTPError as e:
         logger.error(f"Request error searching drinks by ingredient: {e}")
         return None
     except Exception as e:
         logger.error(f"Error searching drinks by ingredient: {e}")
         return None
+
+async def search_drinks_by_ingredient(ingredient: str):
+    """Find drinks containing every ingredient of a comma- or plus-separated list."""
+    ingredients = parse_ingredient_list(ingredient)
+    if not ingredients:
+        return None
+
+    if _ingredient_index is not None:
+        drinks = [_catalog.get(drink_id) for drink_id in _ingredient_index.lookup(ingredients)]
+        return sorted(drinks, key=lambda d: d.name.lower()) or None
+
+    # Without a local index, intersect one upstream lookup per ingredient
+    results = await asyncio.gather(
+        *(_search_drinks_by_single_ingredient(name) for name in ingredients)
+    )
+    if not all(results):
+        return None
+    common = set.intersection(*({drink.id for drink in drinks} for drinks in results))
+    return [drink for drink in results[0] if drink.id in common] or None
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sqlite3
+from services.persistence import connect_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FileIdCache:
+    """Persistent map from idDrink to the Telegram file_id of its thumbnail.
+
+    Reads are served from an in-memory dict; writes go through to SQLite so
+    the map survives restarts. A write that finds the store locked by
+    another worker is skipped; the file_id is still used by this process.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = connect_store(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS photo_file_ids "
+            "(drink_id TEXT PRIMARY KEY, file_id TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._file_ids = dict(self._conn.execute("SELECT drink_id, file_id FROM photo_file_ids"))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._file_ids)
+
+    def __contains__(self, drink_id):
+        return str(drink_id) in self._file_ids
+
+    def get(self, drink_id):
+        file_id = self._file_ids.get(str(drink_id))
+        if file_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return file_id
+
+    def set(self, drink_id, file_id):
+        drink_id = str(drink_id)
+        if self._file_ids.get(drink_id) == file_id:
+            return
+        self._file_ids[drink_id] = file_id
+        self._write("INSERT OR REPLACE INTO photo_file_ids (drink_id, file_id) VALUES (?, ?)", (drink_id, file_id))
+
+    def forget(self, drink_id):
+        drink_id = str(drink_id)
+        if self._file_ids.pop(drink_id, None) is not None:
+            self._write("DELETE FROM photo_file_ids WHERE drink_id = ?", (drink_id,))
+
+    def _write(self, sql, params):
+        try:
+            with self._conn:
+                self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing photo file_id: {e}")
+
+    def close(self):
+        self._conn.close()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._file_ids),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+_cache = None
+
+def open_file_id_cache(path: str):
+    global _cache
+    if _cache is None:
+        _cache = FileIdCache(path)
+        logger.info(f"Loaded {len(_cache)} photo file_ids from {path}")
+    return _cache
+
+def close_file_id_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+def get_file_id_cache():
+    return _cache
+
+def get_file_id_stats():
+    return _cache.stats() if _cache is not None else {}
+
+async def prewarm_file_ids(bot, chat_id, drinks, delay: float = 3.0):
+    """Send every uncached drink photo to a private chat to capture its file_id.
+
+    The messages are deleted again; the file_ids stay valid. delay keeps the
+    bot well under Telegram's per-chat rate limits.
+    """
+    cache = _cache
+    warmed = 0
+    for drink in drinks:
+        if drink.id in cache or not drink.thumb:
+            continue
+        try:
+            message = await bot.send_photo(
+                chat_id=chat_id, photo=drink.thumb, disable_notification=True
+            )
+            cache.set(drink.id, message.photo[-1].file_id)
+            warmed += 1
+            await bot.delete_message(chat_id=chat_id, message_id=message.message_id)
+        except Exception as e:
+            logger.error(f"Error pre-warming photo for drink {drink.id}: {e}")
+        await asyncio.sleep(delay)
+    logger.info(f"Pre-warmed {warmed} photo file_ids")
+    return warmed
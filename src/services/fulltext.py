@@ -0,0 +1,261 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r'\w+')
+
+# Bump when tokenization or the stored layout changes; older stores are re-indexed
+FULLTEXT_FORMAT_VERSION = 2
+
+def tokenize(text: str):
+    return _TOKEN.findall(text.lower())
+
+def document_text(drink) -> str:
+    """Return the text of a drink that full-text search covers."""
+    fields = (drink.instructions, drink.glass, drink.category, drink.alcoholic, ' '.join(drink.tags))
+    return '\n'.join(field for field in fields if field)
+
+class FullTextIndex:
+    """BM25-ranked inverted index over drink instructions, glass, category, type and tags.
+
+    Postings are flat arrays: for every term the sorted IDs of the drinks
+    containing it and how often it occurs in each, plus the ID, text
+    checksum and length of every drink. They can be wrapped as they are,
+    e.g. mapped from a catalog image or read from the store, and sync()
+    re-tokenizes only the drinks whose checksum changed, merging them into
+    the postings of the others.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._term_ids = {}  # term -> array('q') of sorted drink IDs
+        self._term_counts = {}  # term -> array('I') of counts, parallel to the IDs
+        self._doc_ids = array('q')
+        self._doc_checksums = array('I')
+        self._doc_lengths = array('I')
+        self._total_length = 0
+
+    @classmethod
+    def from_arrays(cls, term_ids, term_counts, doc_ids, doc_checksums, doc_lengths, total_length,
+                    k1=1.2, b=0.75):
+        """Wrap prebuilt postings (e.g. memory-mapped ones) without copying them.
+
+        term_ids and term_counts only need get(term); doc_checksums and
+        doc_lengths are parallel to the sorted doc_ids.
+        """
+        index = cls.__new__(cls)
+        index.k1 = k1
+        index.b = b
+        index._term_ids = term_ids
+        index._term_counts = term_counts
+        index._doc_ids = doc_ids
+        index._doc_checksums = doc_checksums
+        index._doc_lengths = doc_lengths
+        index._total_length = total_length
+        return index
+
+    def arrays(self):
+        """Return (term_ids, term_counts, doc_ids, doc_checksums, doc_lengths, total_length)."""
+        return (self._term_ids, self._term_counts, self._doc_ids, self._doc_checksums, self._doc_lengths,
+                self._total_length)
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def document(self, drink_id: int):
+        """Return the (checksum, length) of an indexed drink, or None."""
+        position = bisect_left(self._doc_ids, drink_id)
+        if position == len(self._doc_ids) or self._doc_ids[position] != drink_id:
+            return None
+        return self._doc_checksums[position], self._doc_lengths[position]
+
+    def sync(self, drinks):
+        """Bring the index in line with drinks.
+
+        Returns the IDs of the changed and removed drinks and the terms whose
+        postings changed.
+        """
+        changed = {}
+        seen = set()
+        for drink in drinks:
+            drink_id = int(drink.id)
+            seen.add(drink_id)
+            text = document_text(drink)
+            checksum = zlib.crc32(text.encode('utf-8'))
+            document = self.document(drink_id)
+            if document is not None and document[0] == checksum:
+                continue
+            terms = {}
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0) + 1
+            changed[drink_id] = (checksum, terms)
+        removed = [drink_id for drink_id in self._doc_ids if drink_id not in seen]
+        if not changed and not removed:
+            return [], [], []
+
+        # Old postings of changed and removed drinks are dropped, new ones merged in
+        stale = set(changed).union(removed)
+        added = {}
+        for drink_id, (_, terms) in changed.items():
+            for term, count in terms.items():
+                added.setdefault(term, []).append((drink_id, count))
+        term_ids = {}
+        term_counts = {}
+        touched = []
+        for term in set(self._term_ids.keys()).union(added):
+            ids = self._term_ids.get(term)
+            counts = self._term_counts.get(term)
+            if term not in added and stale.isdisjoint(ids):
+                # Copied so the new postings don't keep an old mapping alive
+                term_ids[term] = array('q', ids.tobytes())
+                term_counts[term] = array('I', counts.tobytes())
+                continue
+            touched.append(term)
+            postings = [] if ids is None else [
+                (drink_id, count) for drink_id, count in zip(ids, counts) if drink_id not in stale
+            ]
+            postings.extend(added.get(term, ()))
+            if postings:
+                postings.sort()
+                term_ids[term] = array('q', (drink_id for drink_id, _ in postings))
+                term_counts[term] = array('I', (count for _, count in postings))
+
+        documents = [
+            (drink_id, checksum, length)
+            for drink_id, checksum, length in zip(self._doc_ids, self._doc_checksums, self._doc_lengths)
+            if drink_id not in stale
+        ]
+        documents.extend(
+            (drink_id, checksum, sum(terms.values())) for drink_id, (checksum, terms) in changed.items()
+        )
+        documents.sort()
+        self._term_ids = term_ids
+        self._term_counts = term_counts
+        self._doc_ids = array('q', (drink_id for drink_id, _, _ in documents))
+        self._doc_checksums = array('I', (checksum for _, checksum, _ in documents))
+        self._doc_lengths = array('I', (length for _, _, length in documents))
+        self._total_length = sum(self._doc_lengths)
+        return list(changed), removed, touched
+
+    def search(self, query: str, limit: int = 10):
+        """Return up to limit (score, drink_id) pairs for query, best first."""
+        count = len(self)
+        if not count:
+            return []
+        average_length = self._total_length / count or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            drink_ids = self._term_ids.get(term)
+            if not drink_ids:
+                continue
+            counts = self._term_counts.get(term)
+            df = len(drink_ids)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for drink_id, tf in zip(drink_ids, counts):
+                length = self._doc_lengths[bisect_left(self._doc_ids, drink_id)]
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                scores[drink_id] = scores.get(drink_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        # Ties go to the lower drink ID so results are stable
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, drink_id) for drink_id, score in best]
+
+def _store_meta(conn):
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fulltext_meta'"
+    ).fetchone() is None:
+        return {}
+    return dict(conn.execute("SELECT key, value FROM fulltext_meta").fetchall())
+
+def _current_format(meta):
+    # Postings are stored as native arrays, so another byte order is another format
+    return meta.get('format_version') == str(FULLTEXT_FORMAT_VERSION) and meta.get('byteorder') == sys.byteorder
+
+def load_fulltext(path: str):
+    """Load a stored full-text index as (index, catalog created_at), or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        meta = _store_meta(conn)
+        if not _current_format(meta):
+            return None
+        term_ids = {}
+        term_counts = {}
+        for term, ids, counts in conn.execute("SELECT term, ids, counts FROM fulltext_terms"):
+            term_ids[term] = array('q', ids)
+            term_counts[term] = array('I', counts)
+        doc_ids = array('q')
+        doc_checksums = array('I')
+        doc_lengths = array('I')
+        for drink_id, checksum, length in conn.execute("SELECT id, checksum, length FROM fulltext_docs ORDER BY id"):
+            doc_ids.append(drink_id)
+            doc_checksums.append(checksum)
+            doc_lengths.append(length)
+    except sqlite3.DatabaseError as e:
+        logger.error(f"Error reading full-text index: {e}")
+        return None
+    finally:
+        conn.close()
+    index = FullTextIndex.from_arrays(term_ids, term_counts, doc_ids, doc_checksums, doc_lengths, sum(doc_lengths))
+    return index, float(meta.get('catalog_created_at', 0))
+
+def save_fulltext(path: str, index, changed, removed, terms, catalog_created_at: float):
+    """Write the changed and removed documents and terms of an index in a single transaction."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    term_ids, term_counts, doc_ids, _, _, _ = index.arrays()
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            if not _current_format(_store_meta(conn)):
+                # An index stored in another format can't be reused, so write it all
+                conn.execute("DROP TABLE IF EXISTS fulltext_docs")
+                conn.execute("DROP TABLE IF EXISTS fulltext_terms")
+                changed = list(doc_ids)
+                terms = list(term_ids.keys())
+            conn.execute("CREATE TABLE IF NOT EXISTS fulltext_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fulltext_docs "
+                "(id INTEGER PRIMARY KEY, checksum INTEGER NOT NULL, length INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fulltext_terms "
+                "(term TEXT PRIMARY KEY, ids BLOB NOT NULL, counts BLOB NOT NULL)"
+            )
+            conn.executemany("DELETE FROM fulltext_docs WHERE id = ?", [(drink_id,) for drink_id in removed])
+            conn.executemany(
+                "INSERT OR REPLACE INTO fulltext_docs (id, checksum, length) VALUES (?, ?, ?)",
+                [(drink_id, *index.document(drink_id)) for drink_id in changed]
+            )
+            conn.executemany(
+                "DELETE FROM fulltext_terms WHERE term = ?", [(term,) for term in terms if term_ids.get(term) is None]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO fulltext_terms (term, ids, counts) VALUES (?, ?, ?)",
+                [
+                    (term, term_ids.get(term).tobytes(), term_counts.get(term).tobytes())
+                    for term in terms if term_ids.get(term) is not None
+                ]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO fulltext_meta (key, value) VALUES (?, ?)",
+                [
+                    ('format_version', str(FULLTEXT_FORMAT_VERSION)), ('byteorder', sys.byteorder),
+                    ('catalog_created_at', str(catalog_created_at))
+                ]
+            )
+    finally:
+        conn.close()
+    logger.info(f"Updated {len(changed)} and removed {len(removed)} documents of the full-text index in {path}")
@@ -0,0 +1,131 @@
+import asyncio
+from http import HTTPStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HttpRequest:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers  # lower-cased header names
+        self.body = body
+
+class HttpResponse:
+    __slots__ = ('status', 'body', 'content_type')
+
+    def __init__(self, status=200, body=b'', content_type='text/plain; charset=utf-8'):
+        self.status = status
+        self.body = body.encode() if isinstance(body, str) else body
+        self.content_type = content_type
+
+class HttpServer:
+    """Minimal asyncio HTTP/1.1 server for webhook, health and metrics endpoints.
+
+    Routes map (method, path) to an async handler taking an HttpRequest and
+    returning an HttpResponse. Keep-alive is supported; chunked request
+    bodies are not (Telegram always sends Content-Length).
+    """
+
+    def __init__(self, routes=None, max_body_size=1 << 20):
+        self.routes = dict(routes or {})
+        self.max_body_size = max_body_size
+        self._server = None
+        self._writers = set()
+
+    def add_route(self, method, path, handler):
+        self.routes[(method, path)] = handler
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        sockets = self._server.sockets or []
+        if sockets:
+            host, port = sockets[0].getsockname()[:2]
+        logger.info(f"HTTP server listening on {host}:{port}")
+        return port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise keep wait_closed() waiting
+            for writer in self._writers:
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, HttpResponse):
+                    await self._write_response(writer, request, keep_alive=False)
+                    break
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split()
+        except ValueError:
+            return HttpResponse(HTTPStatus.BAD_REQUEST, 'Bad Request')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            return HttpResponse(HTTPStatus.LENGTH_REQUIRED, 'Length Required')
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return HttpResponse(HTTPStatus.BAD_REQUEST, 'Bad Request')
+        if length > self.max_body_size:
+            return HttpResponse(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'Payload Too Large')
+        body = await reader.readexactly(length) if length else b''
+
+        path, _, query = target.partition('?')
+        return HttpRequest(method.upper(), path, query, headers, body)
+
+    async def _dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self.routes):
+                return HttpResponse(HTTPStatus.METHOD_NOT_ALLOWED, 'Method Not Allowed')
+            return HttpResponse(HTTPStatus.NOT_FOUND, 'Not Found')
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error handling {request.method} {request.path}: {e}")
+            return HttpResponse(HTTPStatus.INTERNAL_SERVER_ERROR, 'Internal Server Error')
+
+    async def _write_response(self, writer, response, keep_alive):
+        status = HTTPStatus(response.status)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + response.body)
+        await writer.drain()
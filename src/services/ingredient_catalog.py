@@ -0,0 +1,93 @@
+import json
+import os
+import sqlite3
+import time
+from services.ingredient_index import normalize_ingredient
+from services.name_index import NameIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngredientCatalog:
+    """In-memory ingredient details keyed by normalized name, with typo-tolerant lookup."""
+
+    def __init__(self, ingredients, updated_at=None):
+        self.updated_at = updated_at or time.time()
+        self._by_name = {}
+        for ingredient in ingredients:
+            name = normalize_ingredient(ingredient.get('strIngredient') or '')
+            if name:
+                self._by_name[name] = ingredient
+        self._entries = list(self._by_name.values())
+        # Positions in _entries stand in for IDs in the trigram index
+        self._index = NameIndex(
+            (position, ingredient['strIngredient']) for position, ingredient in enumerate(self._entries)
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ingredients(self):
+        return self._entries
+
+    def get(self, name: str):
+        return self._by_name.get(normalize_ingredient(name))
+
+    def search(self, query: str, min_score: float = 0.45):
+        """Return the exact (case-insensitive) match, else the closest name scoring at least min_score."""
+        ingredient = self.get(query)
+        if ingredient is not None:
+            return ingredient
+        matches = self._index.search(query, limit=1, min_score=min_score)
+        if not matches:
+            return None
+        return self._entries[matches[0][1]]
+
+def save_ingredients(path: str, ingredients):
+    """Replace the stored ingredient details in a single transaction."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS ingredient_meta")
+            conn.execute("DROP TABLE IF EXISTS ingredients")
+            conn.execute("CREATE TABLE ingredient_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE ingredients (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            conn.executemany(
+                "INSERT OR REPLACE INTO ingredients (name, data) VALUES (?, ?)",
+                [
+                    (ingredient['strIngredient'], json.dumps(ingredient, separators=(',', ':')))
+                    for ingredient in ingredients
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO ingredient_meta (key, value) VALUES (?, ?)",
+                [('updated_at', str(time.time())), ('ingredient_count', str(len(ingredients)))]
+            )
+    finally:
+        conn.close()
+    logger.info(f"Saved {len(ingredients)} ingredients to {path}")
+
+def load_ingredients(path: str):
+    """Load stored ingredient details, returning None if there are none."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingredient_meta'"
+        ).fetchone() is None:
+            return None
+        meta = dict(conn.execute("SELECT key, value FROM ingredient_meta").fetchall())
+        ingredients = [json.loads(row[0]) for row in conn.execute("SELECT data FROM ingredients")]
+    except sqlite3.DatabaseError as e:
+        logger.error(f"Error reading ingredients: {e}")
+        return None
+    finally:
+        conn.close()
+    catalog = IngredientCatalog(ingredients, updated_at=float(meta.get('updated_at', 0)))
+    logger.info(f"Loaded {len(catalog)} ingredients from {path}")
+    return catalog
@@ -0,0 +1,75 @@
+import re
+from array import array
+from bisect import bisect_left
+
+_SEPARATORS = re.compile(r'[,+]')
+
+def normalize_ingredient(name: str) -> str:
+    """Normalize an ingredient name for index lookups ("  Light  RUM" -> "light rum")."""
+    return ' '.join(name.lower().split())
+
+def parse_ingredient_list(text: str):
+    """Split user input such as "gin, lime + mint" into normalized ingredient names."""
+    names = (normalize_ingredient(part) for part in _SEPARATORS.split(text))
+    return [name for name in names if name]
+
+def _intersect_sorted(small, large):
+    """Intersect two sorted int arrays by binary searching the larger one."""
+    result = array('l')
+    lo = 0
+    size = len(large)
+    for value in small:
+        lo = bisect_left(large, value, lo)
+        if lo == size:
+            break
+        if large[lo] == value:
+            result.append(value)
+    return result
+
+class IngredientIndex:
+    """Inverted index from normalized ingredient name to sorted drink IDs."""
+
+    def __init__(self, drinks):
+        postings = {}
+        for drink in drinks:
+            drink_id = int(drink.id)
+            for measure, ingredient in drink.ingredients:
+                postings.setdefault(normalize_ingredient(ingredient), set()).add(drink_id)
+        self._postings = {
+            name: array('l', sorted(ids)) for name, ids in postings.items()
+        }
+
+    @classmethod
+    def from_postings(cls, postings):
+        """Wrap a prebuilt mapping of ingredient -> sorted IDs (e.g. a memory-mapped one)."""
+        index = cls.__new__(cls)
+        index._postings = postings
+        return index
+
+    def postings(self):
+        return self._postings
+
+    def __len__(self):
+        return len(self._postings)
+
+    def ingredients(self):
+        return self._postings.keys()
+
+    def lookup(self, ingredients):
+        """Return sorted IDs of drinks containing every ingredient in the list."""
+        postings = []
+        for ingredient in ingredients:
+            ids = self._postings.get(normalize_ingredient(ingredient))
+            if not ids:
+                return array('l')
+            postings.append(ids)
+        if not postings:
+            return array('l')
+        # Start from the rarest ingredient so intermediate results stay small
+        postings.sort(key=len)
+        result = postings[0]
+        for ids in postings[1:]:
+            result = _intersect_sorted(result, ids)
+            if not result:
+                break
+        return result
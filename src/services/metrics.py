@@ -0,0 +1,186 @@
+import functools
+import time
+from bisect import bisect_left
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Latency bucket upper bounds in seconds, shared by all histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is one bisect and two additions."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+# name -> {labels tuple: Histogram or int}
+_histograms = {}
+_counters = {}
+# name -> (help text, type)
+_descriptions = {}
+# name -> callable returning {metric name: value} for gauges read at scrape time
+_collectors = {}
+
+def describe(name, help_text, metric_type):
+    _descriptions[name] = (help_text, metric_type)
+
+def observe(name, labels, value):
+    """Record a latency observation; labels is a tuple of (key, value) pairs."""
+    series = _histograms.get(name)
+    if series is None:
+        series = _histograms[name] = {}
+    histogram = series.get(labels)
+    if histogram is None:
+        histogram = series[labels] = Histogram()
+    histogram.observe(value)
+
+def increment(name, labels=(), amount=1):
+    series = _counters.get(name)
+    if series is None:
+        series = _counters[name] = {}
+    series[labels] = series.get(labels, 0) + amount
+
+def register_collector(name, collector):
+    """Add a callable returning {gauge name: value}, evaluated on every scrape."""
+    _collectors[name] = collector
+
+def register_stats(prefix, stats):
+    """Expose every numeric value of a stats() dict as a gauge named prefix_key."""
+    register_collector(prefix, lambda: {
+        f"{prefix}_{key}": value for key, value in stats().items() if isinstance(value, (int, float))
+    })
+
+def get_histogram(name, labels):
+    return _histograms.get(name, {}).get(labels)
+
+def get_counter(name, labels=()):
+    return _counters.get(name, {}).get(labels, 0)
+
+def reset():
+    _histograms.clear()
+    _counters.clear()
+
+def timed_handler(handler):
+    """Record latency and errors of a bot handler under its function name."""
+    labels = (('handler', handler.__name__),)
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            increment('bot_handler_errors_total', labels)
+            raise
+        finally:
+            observe('bot_handler_seconds', labels, time.perf_counter() - start)
+
+    return wrapper
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _collect_gauges():
+    gauges = {}
+    for collector in _collectors.values():
+        try:
+            gauges.update(collector())
+        except Exception as e:
+            logger.warning(f"Metrics collector failed: {e}")
+    return gauges
+
+def render_prometheus():
+    """Return all metrics in the Prometheus text exposition format."""
+    lines = []
+
+    def header(name, default_type):
+        help_text, metric_type = _descriptions.get(name, ('', default_type))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    for name, series in sorted(_histograms.items()):
+        header(name, 'histogram')
+        for labels, histogram in series.items():
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    for name, series in sorted(_counters.items()):
+        header(name, 'counter')
+        for labels, value in series.items():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name, value in sorted(_collect_gauges().items()):
+        header(name, 'gauge')
+        lines.append(f"{name} {float(value)}")
+    return '\n'.join(lines) + '\n'
+
+async def metrics_endpoint(request):
+    """HttpServer handler serving render_prometheus()."""
+    from services.http_server import HttpResponse
+    return HttpResponse(200, render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+
+def summary():
+    """Return a compact human-readable report for the /stats command."""
+    lines = []
+    for name, series in sorted(_histograms.items()):
+        lines.append(f"{name}:")
+        # Error counters are named after their histogram and may carry an extra 'kind' label
+        error_series = _counters.get(name.replace('_seconds', '_errors_total'), {})
+        for labels, histogram in sorted(series.items(), key=lambda item: -item[1].count):
+            label = ','.join(str(value) for _, value in labels)
+            errors = sum(value for key, value in error_series.items() if key[:len(labels)] == labels)
+            lines.append(
+                f"  {label}: n={histogram.count} err={errors} "
+                f"p50={histogram.quantile(0.5) * 1000:.0f}ms p95={histogram.quantile(0.95) * 1000:.0f}ms "
+                f"avg={histogram.sum / histogram.count * 1000:.0f}ms"
+            )
+    gauges = _collect_gauges()
+    if gauges:
+        lines.append("gauges:")
+        lines.extend(f"  {name}={value:.3g}" for name, value in sorted(gauges.items()))
+    return '\n'.join(lines) or "No metrics recorded yet."
+
+describe('bot_handler_seconds', "Time spent in bot update handlers", 'histogram')
+describe('bot_handler_errors_total', "Exceptions raised by bot update handlers", 'counter')
+describe('cocktaildb_request_seconds', "Latency of TheCocktailDB requests", 'histogram')
+describe('cocktaildb_errors_total', "Failed TheCocktailDB requests by kind", 'counter')
+describe('telegram_request_seconds', "Latency of Telegram Bot API requests", 'histogram')
+describe('telegram_errors_total', "Failed Telegram Bot API requests by kind", 'counter')
@@ -0,0 +1,118 @@
+import sys
+from collections import OrderedDict
+
+def _intern(value):
+    """Strip and intern a repeated API string, mapping empty values to None."""
+    if not value:
+        return None
+    value = value.strip()
+    return sys.intern(value) if value else None
+
+class Drink:
+    """Compact drink record parsed from a TheCocktailDB API dict.
+
+    Only the fields the bot uses are kept; null fields are dropped, and
+    category, glass, measure and ingredient strings are interned so that a
+    catalog of drinks shares one copy of each.
+    """
+
+    __slots__ = (
+        'id', 'name', 'alternate_name', 'category', 'alcoholic', 'glass',
+        'instructions', 'thumb', 'tags', 'ingredients'
+    )
+
+    def __init__(self, id, name, alternate_name=None, category=None, alcoholic=None,
+                 glass=None, instructions=None, thumb=None, tags=(), ingredients=()):
+        self.id = id
+        self.name = name
+        self.alternate_name = alternate_name
+        self.category = category
+        self.alcoholic = alcoholic
+        self.glass = glass
+        self.instructions = instructions
+        self.thumb = thumb
+        self.tags = tags
+        self.ingredients = ingredients  # tuple of (measure or None, ingredient)
+
+    @classmethod
+    def from_api(cls, data):
+        ingredients = []
+        for i in range(1, 16):
+            ingredient = _intern(data.get(f'strIngredient{i}'))
+            if ingredient:
+                ingredients.append((_intern(data.get(f'strMeasure{i}')), ingredient))
+        tags = data.get('strTags')
+        return cls(
+            id=sys.intern(str(data['idDrink'])),
+            name=data['strDrink'],
+            alternate_name=data.get('strDrinkAlternate') or None,
+            category=_intern(data.get('strCategory')),
+            alcoholic=_intern(data.get('strAlcoholic')),
+            glass=_intern(data.get('strGlass')),
+            instructions=data.get('strInstructions') or None,
+            thumb=data.get('strDrinkThumb') or None,
+            tags=tuple(_intern(tag) for tag in tags.split(',') if tag.strip()) if tags else (),
+            ingredients=tuple(ingredients)
+        )
+
+    def to_api(self):
+        """Return the drink in TheCocktailDB's JSON shape, without null fields."""
+        data = {'idDrink': self.id, 'strDrink': self.name}
+        optional = {
+            'strDrinkAlternate': self.alternate_name,
+            'strCategory': self.category,
+            'strAlcoholic': self.alcoholic,
+            'strGlass': self.glass,
+            'strInstructions': self.instructions,
+            'strDrinkThumb': self.thumb,
+            'strTags': ','.join(self.tags) if self.tags else None,
+        }
+        data.update((key, value) for key, value in optional.items() if value)
+        for i, (measure, ingredient) in enumerate(self.ingredients, 1):
+            data[f'strIngredient{i}'] = ingredient
+            if measure:
+                data[f'strMeasure{i}'] = measure
+        return data
+
+    def __repr__(self):
+        return f"Drink(id={self.id!r}, name={self.name!r})"
+
+def parse_drinks(drinks):
+    """Parse a list of API drink dicts, passing None through."""
+    if not drinks or not isinstance(drinks, list):
+        return None
+    return [Drink.from_api(drink) for drink in drinks]
+
+CAPTION_TEMPLATES = {
+    'recipe': (
+        "📑 *Category:* {category}\n\n"
+        "🧪 *Ingredients:*\n{ingredients}\n\n"
+        "📝 *Instructions:*\n{instructions}"
+    ),
+}
+
+_CAPTION_CACHE_SIZE = 5000
+_captions = OrderedDict()  # (drink id, template) -> (drink, text)
+
+def render_caption(drink, template='recipe'):
+    """Render a Markdown caption body for a drink, memoized per drink ID and template."""
+    key = (drink.id, template)
+    cached = _captions.get(key)
+    # A different Drink object for the same ID means the record was refreshed
+    if cached is not None and cached[0] is drink:
+        _captions.move_to_end(key)
+        return cached[1]
+
+    ingredients = '\n'.join(
+        f"🔸 {measure} {ingredient}" if measure else f"🔸 {ingredient}"
+        for measure, ingredient in drink.ingredients
+    )
+    text = CAPTION_TEMPLATES[template].format(
+        category=drink.category or 'N/A',
+        ingredients=ingredients,
+        instructions=drink.instructions or 'N/A'
+    )
+    _captions[key] = (drink, text)
+    if len(_captions) > _CAPTION_CACHE_SIZE:
+        _captions.popitem(last=False)
+    return text
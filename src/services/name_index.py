@@ -0,0 +1,83 @@
+from array import array
+from difflib import SequenceMatcher
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.lower().replace('_', ' ').split())
+
+def _trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """Trigram index over drink names for typo-tolerant lookups.
+
+    Candidates are gathered from shared trigrams, scored with the Dice
+    coefficient and the best ones re-ranked with an edit-distance ratio.
+    """
+
+    def __init__(self, entries):
+        # entries: iterable of (drink_id, name); a drink may appear under several names
+        self._names = []
+        self._ids = array('l')
+        self._gram_counts = array('H')
+        postings = {}
+        for drink_id, name in entries:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            position = len(self._names)
+            self._names.append(normalized)
+            self._ids.append(int(drink_id))
+            grams = _trigrams(normalized)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, array('l')).append(position)
+        self._postings = postings
+
+    @classmethod
+    def from_arrays(cls, names, ids, gram_counts, postings):
+        """Wrap prebuilt arrays (e.g. memory-mapped ones) without copying them.
+
+        postings maps a trigram to the positions of the names containing it.
+        """
+        index = cls.__new__(cls)
+        index._names = names
+        index._ids = ids
+        index._gram_counts = gram_counts
+        index._postings = postings
+        return index
+
+    def arrays(self):
+        """Return the (names, ids, gram_counts, postings) arrays, e.g. for writing a catalog image."""
+        return self._names, self._ids, self._gram_counts, self._postings
+
+    def __len__(self):
+        return len(self._names)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.3, rerank: int = 20):
+        """Return up to limit (score, drink_id) pairs, best first, one per drink."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        query_grams = _trigrams(normalized)
+        shared = {}
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        total = len(query_grams)
+        candidates = sorted(
+            ((2.0 * count / (total + self._gram_counts[position]), position)
+             for position, count in shared.items()),
+            reverse=True
+        )[:rerank]
+
+        best = {}
+        for dice, position in candidates:
+            ratio = SequenceMatcher(None, normalized, self._names[position]).ratio()
+            score = (dice + ratio) / 2
+            drink_id = self._ids[position]
+            if score >= min_score and score > best.get(drink_id, 0.0):
+                best[drink_id] = score
+        ranked = sorted(((score, drink_id) for drink_id, score in best.items()), reverse=True)
+        return ranked[:limit]
@@ -0,0 +1,72 @@
+from array import array
+from bisect import bisect_left
+from services.ingredient_index import normalize_ingredient
+
+class PantryMatcher:
+    """Ingredient bitsets per drink for "what can I make?" lookups.
+
+    Every known ingredient is one bit and every drink an int with the bits
+    of its ingredients set, so the ingredients a pantry lacks for a drink
+    are drink & ~pantry and matching a pantry against the whole catalog is
+    one pass of AND/popcount over the masks.
+    """
+
+    def __init__(self, postings):
+        # postings: normalized ingredient -> sorted drink IDs, as kept by IngredientIndex
+        self._names = sorted(postings.keys())
+        self._bits = {name: 1 << bit for bit, name in enumerate(self._names)}
+        masks = {}
+        for name, bit in self._bits.items():
+            for drink_id in postings.get(name):
+                masks[drink_id] = masks.get(drink_id, 0) | bit
+        self._ids = array('q', sorted(masks))
+        self._masks = [masks[drink_id] for drink_id in self._ids]
+        self._sizes = array('B', (bin(mask).count('1') for mask in self._masks))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def pantry_mask(self, ingredients):
+        """Return (mask, unknown) for a list of ingredient names; unknown ones are not in any drink."""
+        mask = 0
+        unknown = []
+        for ingredient in ingredients:
+            bit = self._bits.get(normalize_ingredient(ingredient))
+            if bit is None:
+                unknown.append(ingredient)
+            else:
+                mask |= bit
+        return mask, unknown
+
+    def ingredient_names(self, mask):
+        """Return the normalized ingredient names of the bits set in mask."""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self._names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def missing(self, drink_id, pantry):
+        """Return the mask of drink_id's ingredients the pantry lacks, or None for an unknown drink."""
+        position = bisect_left(self._ids, int(drink_id))
+        if position == len(self._ids) or self._ids[position] != int(drink_id):
+            return None
+        return self._masks[position] & ~pantry
+
+    def match(self, pantry, max_missing=2):
+        """Return (missing count, drink_id) for drinks sharing an ingredient with the pantry.
+
+        Drinks lacking more than max_missing ingredients are left out; the rest
+        come fewest missing first, then fewest ingredients, then by ID.
+        """
+        if not pantry:
+            return []
+        matches = []
+        for drink_id, mask, size in zip(self._ids, self._masks, self._sizes):
+            if mask & pantry:
+                missing = bin(mask & ~pantry).count('1')
+                if missing <= max_missing:
+                    matches.append((missing, size, drink_id))
+        matches.sort()
+        return [(missing, drink_id) for missing, _, drink_id in matches]
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import sqlite3
+from telegram.ext import BasePersistence, PersistenceInput
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sharded workers write to the same file: WAL lets them read while another
+# commits, and a short busy timeout keeps a locked write from stalling the
+# event loop for sqlite3's default 5 seconds (the batch is retried instead)
+BUSY_TIMEOUT_MS = 200
+
+def connect_store(path: str):
+    """Open a read-write connection to a store shared between worker processes."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+class SQLitePersistence(BasePersistence):
+    """BasePersistence backed by SQLite with batched writes.
+
+    Changes reported by the application are staged in memory and written in
+    one transaction commit_delay seconds after the first staged change, so a
+    whole update_persistence run costs a single commit. Data is stored as
+    JSON. Besides user/chat/bot data and conversation states, the store
+    keeps named state blobs (save_state/load_state) for warm caches.
+    """
+
+    def __init__(self, path: str, update_interval: float = 30, commit_delay: float = 1.0):
+        # Arbitrary callback data is not used by this bot
+        super().__init__(store_data=PersistenceInput(callback_data=False), update_interval=update_interval)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.commit_delay = commit_delay
+        self._conn = connect_store(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS user_data (id INTEGER PRIMARY KEY, data TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS chat_data (id INTEGER PRIMARY KEY, data TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "name TEXT NOT NULL, key TEXT NOT NULL, state TEXT NOT NULL, PRIMARY KEY (name, key));"
+            "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, data TEXT NOT NULL);"
+        )
+        self._conn.commit()
+        self._pending = {}  # (table, key) -> serialized value, or None to delete
+        self._commit_handle = None
+        self.commits = 0
+        self.rows_written = 0
+
+    # Reading
+
+    def _load_rows(self, table):
+        return {
+            row_id: json.loads(data)
+            for row_id, data in self._conn.execute(f"SELECT id, data FROM {table}")
+        }
+
+    async def get_user_data(self):
+        return self._load_rows('user_data')
+
+    async def get_chat_data(self):
+        return self._load_rows('chat_data')
+
+    async def get_bot_data(self):
+        return self.load_state('bot_data') or {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        return {
+            tuple(json.loads(key)): json.loads(state)
+            for key, state in self._conn.execute(
+                "SELECT key, state FROM conversations WHERE name = ?", (name,)
+            )
+        }
+
+    def load_state(self, name):
+        """Return a named JSON blob saved with save_state, or None."""
+        row = self._conn.execute("SELECT data FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Writing
+
+    def _stage(self, table, key, value):
+        if value is not None:
+            try:
+                value = json.dumps(value, separators=(',', ':'))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Cannot persist {table} entry {key}: {e}")
+                return
+        self._pending[(table, key)] = value
+        if self._commit_handle is None:
+            self._commit_handle = asyncio.get_running_loop().call_later(self.commit_delay, self._commit)
+
+    def _commit(self):
+        self._commit_handle = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            with self._conn:
+                for (table, key), value in pending.items():
+                    if table == 'conversations':
+                        name, conversation_key = key
+                        if value is None:
+                            self._conn.execute(
+                                "DELETE FROM conversations WHERE name = ? AND key = ?", (name, conversation_key)
+                            )
+                        else:
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                                (name, conversation_key, value)
+                            )
+                    elif table == 'state':
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO state (name, data) VALUES (?, ?)", (key, value)
+                        )
+                    elif value is None:
+                        self._conn.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+                    else:
+                        self._conn.execute(
+                            f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)", (key, value)
+                        )
+            self.commits += 1
+            self.rows_written += len(pending)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing persistence batch: {e}")
+            # Keep the batch, newer staged values win, and try again later
+            pending.update(self._pending)
+            self._pending = pending
+            self._schedule_retry()
+
+    def _schedule_retry(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._commit_handle is None:
+            self._commit_handle = loop.call_later(self.commit_delay, self._commit)
+
+    async def update_user_data(self, user_id, data):
+        self._stage('user_data', user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._stage('chat_data', chat_id, data)
+
+    async def update_bot_data(self, data):
+        self._stage('state', 'bot_data', data)
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def update_conversation(self, name, key, new_state):
+        self._stage('conversations', (name, json.dumps(list(key))), new_state)
+
+    async def drop_chat_data(self, chat_id):
+        self._stage('chat_data', chat_id, None)
+
+    async def drop_user_data(self, user_id):
+        self._stage('user_data', user_id, None)
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    def save_state(self, name, data):
+        """Stage a named JSON blob; written with the next batch or on flush."""
+        self._stage('state', name, data)
+
+    async def flush(self):
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+        self._commit()
+
+    def close(self):
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+        self._commit()
+        # A failed last batch must not leave a retry running against the closed connection
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+            self._commit_handle = None
+        self._conn.close()
+
+    def stats(self):
+        return {
+            'pending_writes': len(self._pending),
+            'commits': self.commits,
+            'rows_written': self.rows_written,
+        }
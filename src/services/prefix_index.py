@@ -0,0 +1,74 @@
+from array import array
+from bisect import bisect_left
+from services.name_index import normalize_name
+
+# Sorts after every character that can follow a prefix
+_PREFIX_END = '\U0010ffff'
+
+def _word_starts(name: str):
+    """Yield name and every suffix of it that starts at a word ("black russian" -> "russian")."""
+    yield name
+    for i, char in enumerate(name):
+        if char == ' ' and i + 1 < len(name):
+            yield name[i + 1:]
+
+class PrefixIndex:
+    """Sorted array of normalized names answering prefix queries with two bisects.
+
+    With words=True every word of a name is indexed too, so "russ" finds
+    "Black Russian". Drink IDs are kept in a parallel array('l') and display
+    names in a parallel list, so a page of results is a slice.
+    """
+
+    def __init__(self, entries, words=False):
+        # entries: iterable of (drink_id, name); a drink may appear under several names
+        keys = []
+        for drink_id, name in entries:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            for key in (_word_starts(normalized) if words else (normalized,)):
+                keys.append((key, int(drink_id), name))
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._ids = array('l', (drink_id for _, drink_id, _ in keys))
+        self._names = [name for _, _, name in keys]
+
+    @classmethod
+    def from_arrays(cls, keys, ids, names):
+        """Wrap prebuilt sorted arrays (e.g. memory-mapped ones) without copying them."""
+        index = cls.__new__(cls)
+        index._keys = keys
+        index._ids = ids
+        index._names = names
+        return index
+
+    def arrays(self):
+        """Return the (keys, ids, names) arrays, e.g. for writing a catalog image."""
+        return self._keys, self._ids, self._names
+
+    def __len__(self):
+        return len(self._keys)
+
+    def range(self, prefix: str):
+        """Return the (start, stop) positions of keys starting with prefix."""
+        prefix = normalize_name(prefix)
+        start = bisect_left(self._keys, prefix)
+        return start, bisect_left(self._keys, prefix + _PREFIX_END, start)
+
+    def entries(self, start: int, stop: int):
+        """Return (drink_id, name) pairs for positions start..stop of the sorted keys."""
+        return list(zip(self._ids[start:stop], self._names[start:stop]))
+
+    def lookup(self, prefix: str, limit: int = None):
+        """Return distinct drink IDs whose name starts with prefix, in name order."""
+        start, stop = self.range(prefix)
+        seen = set()
+        result = []
+        for drink_id in self._ids[start:stop]:
+            if drink_id not in seen:
+                seen.add(drink_id)
+                result.append(drink_id)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
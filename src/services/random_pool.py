@@ -0,0 +1,134 @@
+import asyncio
+from collections import OrderedDict, deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RandomPool:
+    """Buffer of prefetched random drinks, refilled in the background.
+
+    A refill starts whenever the buffer drops below low_water and tops it up
+    to size. Each user's recently served drinks are skipped when possible;
+    when upstream is down the fallback (e.g. the local catalog) is used.
+    """
+
+    def __init__(self, fetch, fallback=None, size=30, low_water=10, history_size=20,
+                 refill_concurrency=3, max_users=10000, retry_delay=5.0):
+        self._fetch = fetch
+        self._fallback = fallback
+        self.size = size
+        self.low_water = low_water
+        self.history_size = history_size
+        self.refill_concurrency = refill_concurrency
+        self.max_users = max_users
+        self.retry_delay = retry_delay
+        self._buffer = deque()
+        self._history = OrderedDict()  # user_id -> deque of recent drink IDs
+        self._refill_needed = asyncio.Event()
+        self._task = None
+        self.served_from_buffer = 0
+        self.served_from_fallback = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def start(self):
+        if self._task is None:
+            self._refill_needed.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            try:
+                await self._refill()
+            except Exception as e:
+                logger.error(f"Error refilling random pool: {e}")
+            if len(self._buffer) < self.low_water:
+                # Upstream is failing; try again later rather than spinning
+                await asyncio.sleep(self.retry_delay)
+                self._refill_needed.set()
+
+    async def _refill(self):
+        while len(self._buffer) < self.size:
+            wanted = min(self.refill_concurrency, self.size - len(self._buffer))
+            drinks = await asyncio.gather(*(self._fetch() for _ in range(wanted)))
+            buffered = {drink.id for drink in self._buffer}
+            added = 0
+            for drink in drinks:
+                if drink and drink.id not in buffered:
+                    self._buffer.append(drink)
+                    buffered.add(drink.id)
+                    added += 1
+            if not added:
+                # Upstream failed or only returned duplicates
+                return
+
+    def take(self, user_id=None):
+        """Return a drink from memory, or None if neither buffer nor fallback has one."""
+        recent = self._recent_for(user_id)
+        drink = self._take_from_buffer(recent)
+        if drink is not None:
+            self.served_from_buffer += 1
+        elif self._fallback is not None:
+            drink = self._take_from_fallback(recent)
+            if drink is not None:
+                self.served_from_fallback += 1
+        if len(self._buffer) < self.low_water:
+            self._refill_needed.set()
+        if drink is None:
+            self.misses += 1
+            return None
+        if recent is not None:
+            recent.append(drink.id)
+        return drink
+
+    def _recent_for(self, user_id):
+        if user_id is None:
+            return None
+        recent = self._history.get(user_id)
+        if recent is None:
+            recent = self._history[user_id] = deque(maxlen=self.history_size)
+            while len(self._history) > self.max_users:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(user_id)
+        return recent
+
+    def _take_from_buffer(self, recent):
+        if not self._buffer:
+            return None
+        if recent:
+            for index, drink in enumerate(self._buffer):
+                if drink.id not in recent:
+                    del self._buffer[index]
+                    return drink
+        # Everything buffered was seen recently; a repeat beats waiting on the network
+        return self._buffer.popleft()
+
+    def _take_from_fallback(self, recent, attempts=5):
+        drink = None
+        for _ in range(attempts):
+            drink = self._fallback()
+            if drink is None or not recent or drink.id not in recent:
+                break
+        return drink
+
+    def stats(self):
+        return {
+            'buffered': len(self._buffer),
+            'served_from_buffer': self.served_from_buffer,
+            'served_from_fallback': self.served_from_fallback,
+            'misses': self.misses,
+        }
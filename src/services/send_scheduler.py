@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from telegram.error import RetryAfter, TelegramError, TimedOut
+from telegram.ext import BaseRateLimiter
+from services import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+_send_priority = ContextVar('send_priority', default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def bulk_sends():
+    """Send everything inside the block behind interactive replies."""
+    token = _send_priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+class TokenBucket:
+    """Classic token bucket; rate tokens per second up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def consume(self):
+        self.tokens -= 1
+
+class SendScheduler(BaseRateLimiter):
+    """Outbound request scheduler for the bot.
+
+    Requests addressed to a chat are queued by priority and released when
+    both the global bucket and that chat's bucket have a token, so menus
+    and prompts overtake bulk result pages. Each chat has its own heap and
+    a ready heap holds one entry per chat for its first request, so a
+    chat that can't send yet costs one pop and push per release however
+    many requests it has queued. Requests without a chat (e.g.
+    answerCallbackQuery) skip the queue. RetryAfter errors block the chat for
+    the requested time and the request is retried.
+    """
+
+    def __init__(self, global_rate=30.0, chat_rate=1.0, chat_burst=3,
+                 group_messages_per_minute=20, max_retries=3, max_idle_chats=10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_messages_per_minute / 60.0
+        self.max_retries = max_retries
+        self.max_idle_chats = max_idle_chats
+        self._chat_buckets = {}
+        self._chats = {}  # chat_id -> heap of (priority, seq, future, enqueued_at)
+        self._ready = []  # heap of (priority, seq, chat_id) for the first request of each chat
+        self._queued = 0
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self.sent = 0
+        self.released = 0
+        self.retries = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def initialize(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for requests in self._chats.values():
+            for _, _, future, _ in requests:
+                future.cancel()
+        self._chats.clear()
+        self._ready.clear()
+        self._queued = 0
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        priority = rate_limit_args if rate_limit_args is not None else _send_priority.get()
+        for attempt in range(self.max_retries + 1):
+            if chat_id is not None and self._task is not None:
+                await self._acquire(chat_id, priority)
+            labels = (('method', endpoint),)
+            start = time.perf_counter()
+            try:
+                result = await callback(*args, **kwargs)
+                self.sent += 1
+                return result
+            except RetryAfter as e:
+                metrics.increment('telegram_errors_total', labels + (('kind', 'retry_after'),))
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                retry_after = float(e.retry_after)
+                logger.warning(f"Flood control on {endpoint} for chat {chat_id}, retrying in {retry_after}s")
+                if chat_id is None:
+                    await asyncio.sleep(retry_after)
+                else:
+                    self._bucket_for(chat_id).blocked_until = time.monotonic() + retry_after
+            except TimedOut:
+                metrics.increment('telegram_errors_total', labels + (('kind', 'timeout'),))
+                raise
+            except TelegramError:
+                metrics.increment('telegram_errors_total', labels + (('kind', 'error'),))
+                raise
+            finally:
+                metrics.observe('telegram_request_seconds', labels, time.perf_counter() - start)
+
+    async def _acquire(self, chat_id, priority):
+        future = asyncio.get_running_loop().create_future()
+        seq = next(self._seq)
+        requests = self._chats.setdefault(chat_id, [])
+        heapq.heappush(requests, (priority, seq, future, time.monotonic()))
+        if requests[0][1] == seq:
+            # New first request of the chat; an older ready entry goes stale and is skipped
+            heapq.heappush(self._ready, (priority, seq, chat_id))
+        self._queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        self._wakeup.set()
+        await future
+
+    def _bucket_for(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.max_idle_chats:
+                self._drop_idle_buckets()
+            # Groups and channels (negative IDs or @usernames) have a stricter limit
+            rate = self.group_rate if str(chat_id).startswith(('-', '@')) else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _drop_idle_buckets(self):
+        now = time.monotonic()
+        queued = self._chats
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if chat_id not in queued and bucket.wait_time(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self._chat_buckets[chat_id]
+
+    async def _dispatch(self):
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait > 0:
+                await self._sleep(global_wait)
+                continue
+
+            # Release the highest priority request whose chat can send right now;
+            # chats that can't are set aside and pushed back afterwards
+            next_wait = None
+            blocked = []
+            while self._ready:
+                entry = heapq.heappop(self._ready)
+                priority, seq, chat_id = entry
+                requests = self._chats.get(chat_id)
+                if not requests or requests[0][1] != seq:
+                    continue  # stale entry, the chat's first request changed
+                if self._drop_cancelled(chat_id, requests):
+                    continue
+                wait = self._bucket_for(chat_id).wait_time(now)
+                if wait > 0:
+                    blocked.append(entry)
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    continue
+                _, _, future, enqueued_at = self._pop_request(chat_id, requests)
+                self._bucket_for(chat_id).consume()
+                self.global_bucket.consume()
+                waited = now - enqueued_at
+                self.released += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                future.set_result(None)
+                next_wait = 0.0
+                break
+            for entry in blocked:
+                heapq.heappush(self._ready, entry)
+
+            if next_wait:
+                await self._sleep(next_wait)
+            else:
+                # Let the released request run before picking the next one
+                await asyncio.sleep(0)
+
+    async def _sleep(self, seconds):
+        """Sleep until seconds pass or a new request arrives."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _pop_request(self, chat_id, requests):
+        """Remove a chat's first request, queueing the chat again if it has more."""
+        request = heapq.heappop(requests)
+        self._queued -= 1
+        if requests:
+            heapq.heappush(self._ready, (requests[0][0], requests[0][1], chat_id))
+        else:
+            del self._chats[chat_id]
+        return request
+
+    def _drop_cancelled(self, chat_id, requests):
+        """Drop the chat's first request if its sender gave up; return whether it was dropped."""
+        if not requests[0][2].cancelled():
+            return False
+        self._pop_request(chat_id, requests)
+        return True
+
+    def stats(self):
+        return {
+            'queue_depth': self._queued,
+            'max_queue_depth': self.max_queue_depth,
+            'sent': self.sent,
+            'retries': self.retries,
+            'avg_wait': self.total_wait / self.released if self.released else 0.0,
+            'max_wait': self.max_wait,
+        }
@@ -0,0 +1,83 @@
+import hmac
+import json
+from http import HTTPStatus
+import httpx
+from services.http_server import HttpServer, HttpResponse
+from services.webhook import SECRET_TOKEN_HEADER
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Path on which worker processes receive updates forwarded by the front
+WORKER_UPDATE_PATH = '/update'
+
+_CHAT_UPDATES = ('message', 'edited_message', 'channel_post', 'edited_channel_post')
+_USER_UPDATES = ('inline_query', 'chosen_inline_result', 'shipping_query', 'pre_checkout_query')
+
+def shard_key(update: dict) -> int:
+    """Return the chat ID an update belongs to, or the user ID for updates without a chat."""
+    for key in _CHAT_UPDATES:
+        if key in update:
+            return update[key]['chat']['id']
+    callback_query = update.get('callback_query')
+    if callback_query:
+        message = callback_query.get('message')
+        if message:
+            return message['chat']['id']
+        return callback_query['from']['id']
+    for key in _USER_UPDATES:
+        if key in update:
+            return update[key]['from']['id']
+    return update.get('update_id', 0)
+
+def shard_for(update: dict, workers: int) -> int:
+    return shard_key(update) % workers
+
+def create_front_server(client, worker_urls, url_path: str, secret_token=None, worker_token=None):
+    """Build an HttpServer that forwards each pushed update to the worker owning its chat.
+
+    worker_urls are the workers' base URLs; a worker's answer is relayed to
+    Telegram, and an unreachable worker yields 503 so Telegram retries the
+    update later. /healthz and /readyz are served as on a single process,
+    with /readyz requiring every worker to be ready.
+    """
+    server = HttpServer()
+    forward_headers = {'content-type': 'application/json'}
+    if worker_token is not None:
+        forward_headers[SECRET_TOKEN_HEADER] = worker_token
+
+    async def receive_update(request):
+        if secret_token is not None:
+            supplied = request.headers.get(SECRET_TOKEN_HEADER, '')
+            if not hmac.compare_digest(supplied.encode(), secret_token.encode()):
+                return HttpResponse(HTTPStatus.FORBIDDEN, 'Forbidden')
+        try:
+            worker = shard_for(json.loads(request.body), len(worker_urls))
+        except (ValueError, KeyError, TypeError):
+            return HttpResponse(HTTPStatus.BAD_REQUEST, 'Invalid update')
+        try:
+            response = await client.post(
+                f"{worker_urls[worker]}{WORKER_UPDATE_PATH}", content=request.body, headers=forward_headers
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Worker {worker} unavailable: {e}")
+            return HttpResponse(HTTPStatus.SERVICE_UNAVAILABLE, 'Worker unavailable')
+        return HttpResponse(response.status_code, response.content)
+
+    async def health(request):
+        return HttpResponse(HTTPStatus.OK, 'ok')
+
+    async def ready(request):
+        for url in worker_urls:
+            try:
+                response = await client.get(f"{url}/readyz")
+            except httpx.HTTPError:
+                return HttpResponse(HTTPStatus.SERVICE_UNAVAILABLE, 'not ready')
+            if response.status_code != HTTPStatus.OK:
+                return HttpResponse(HTTPStatus.SERVICE_UNAVAILABLE, 'not ready')
+        return HttpResponse(HTTPStatus.OK, 'ready')
+
+    server.add_route('POST', url_path, receive_update)
+    server.add_route('GET', '/healthz', health)
+    server.add_route('GET', '/readyz', ready)
+    return server
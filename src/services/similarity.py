@@ -0,0 +1,85 @@
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from services.ingredient_index import normalize_ingredient
+
+class SimilarityIndex:
+    """Precomputed nearest neighbours of every drink by shared ingredients.
+
+    Drinks are TF-IDF weighted ingredient vectors, so sharing a rare
+    ingredient counts for more than sharing ice or sugar. The top-k cosine
+    neighbours of all drinks are computed in one pass over the inverted
+    ingredient postings (a sparse product of the drink-by-ingredient matrix
+    with its transpose) and kept as a flat array('q') of k slots per drink,
+    so a lookup is a bisect and a slice.
+    """
+
+    def __init__(self, drinks, k=5):
+        vectors = {}
+        document_counts = {}
+        for drink in drinks:
+            ingredients = {normalize_ingredient(ingredient) for _, ingredient in drink.ingredients}
+            vectors[int(drink.id)] = ingredients
+            for ingredient in ingredients:
+                document_counts[ingredient] = document_counts.get(ingredient, 0) + 1
+
+        # Smoothed IDF keeps ingredients found in every drink from weighing zero
+        count = len(vectors)
+        idf = {
+            ingredient: math.log((1 + count) / (1 + df)) + 1
+            for ingredient, df in document_counts.items()
+        }
+        weights = {}
+        for drink_id, ingredients in vectors.items():
+            norm = math.sqrt(sum(idf[ingredient] ** 2 for ingredient in ingredients)) or 1.0
+            weights[drink_id] = [(ingredient, idf[ingredient] / norm) for ingredient in ingredients]
+        # Columns of the weight matrix: ingredient -> [(drink_id, weight)]
+        columns = {ingredient: [] for ingredient in document_counts}
+        for drink_id, row in weights.items():
+            for ingredient, weight in row:
+                columns[ingredient].append((drink_id, weight))
+
+        self._k = k
+        self._ids = array('q', sorted(vectors))
+        self._neighbours = array('q')
+        for drink_id in self._ids:
+            scores = {}
+            get = scores.get
+            for ingredient, weight in weights[drink_id]:
+                for other_id, other_weight in columns[ingredient]:
+                    scores[other_id] = get(other_id, 0.0) + weight * other_weight
+            scores.pop(drink_id, None)
+            # Ties go to the lower drink ID so the result does not depend on dict order
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+            self._neighbours.extend(other_id for other_id, _ in best)
+            self._neighbours.extend([0] * (k - len(best)))
+
+    @classmethod
+    def from_arrays(cls, ids, neighbours):
+        """Wrap prebuilt arrays (e.g. memory-mapped ones) without copying them."""
+        index = cls.__new__(cls)
+        index._ids = ids
+        index._neighbours = neighbours
+        index._k = len(neighbours) // len(ids) if len(ids) else 0
+        return index
+
+    def arrays(self):
+        """Return the (ids, neighbours) arrays, e.g. for writing a catalog image."""
+        return self._ids, self._neighbours
+
+    def __len__(self):
+        return len(self._ids)
+
+    def neighbours(self, drink_id):
+        """Return the IDs of the drinks most similar to drink_id, most similar first."""
+        try:
+            drink_id = int(drink_id)
+        except (TypeError, ValueError):
+            return []
+        position = bisect_left(self._ids, drink_id)
+        if position == len(self._ids) or self._ids[position] != drink_id:
+            return []
+        start = position * self._k
+        # 0 pads drinks with fewer than k neighbours; TheCocktailDB IDs start well above it
+        return [other_id for other_id in self._neighbours[start:start + self._k] if other_id]
@@ -0,0 +1,42 @@
+import asyncio
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller starts the call in its own task; callers arriving while it
+    is in flight await the same task and receive its result or its exception.
+    Cancelling one caller does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._inflight = {}  # key -> asyncio.Task
+        self.executed = 0
+        self.deduplicated = 0
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executed += 1
+        else:
+            self.deduplicated += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so it isn't logged as never retrieved when
+        # every caller was cancelled before the shared call failed
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        total = self.executed + self.deduplicated
+        return {
+            'in_flight': len(self._inflight),
+            'executed': self.executed,
+            'deduplicated': self.deduplicated,
+            'dedup_ratio': self.deduplicated / total if total else 0.0,
+        }
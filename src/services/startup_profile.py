@@ -0,0 +1,61 @@
+import time
+from telegram.request import HTTPXRequest
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StartupProfile:
+    """Wall-clock time of each startup phase, reported by --profile-startup.
+
+    mark(phase) closes the phase that ran since the previous mark; times
+    are measured from started, which bot.py takes before importing
+    anything else.
+    """
+
+    def __init__(self, started=None, marks=()):
+        # marks: (phase, perf_counter() value) pairs taken before the profile existed
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []
+        self.enabled = False
+        self.reported = False
+        for phase, timestamp in marks:
+            self.phases.append((phase, timestamp - self._last))
+            self._last = timestamp
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def total(self):
+        return self._last - self.started
+
+    def report(self):
+        """Log the breakdown once; later calls do nothing."""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        width = max(len(phase) for phase, _ in self.phases)
+        lines = [f"  {phase:<{width}}  {seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"  {'total':<{width}}  {self.total() * 1000:8.1f} ms")
+        logger.info("Startup profile:\n" + '\n'.join(lines))
+
+class FirstPollRequest(HTTPXRequest):
+    """getUpdates request that calls on_first_poll() when the first poll is sent.
+
+    A long poll only returns once there are updates, so the bot counts as
+    receiving as soon as the first one is on its way.
+    """
+
+    __slots__ = ('_on_first_poll',)
+
+    def __init__(self, on_first_poll, **kwargs):
+        super().__init__(**kwargs)
+        self._on_first_poll = on_first_poll
+
+    async def do_request(self, *args, **kwargs):
+        if self._on_first_poll is not None:
+            callback, self._on_first_poll = self._on_first_poll, None
+            callback()
+        return await super().do_request(*args, **kwargs)
@@ -0,0 +1,44 @@
+import asyncio
+from telegram.ext import BaseUpdateProcessor
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently while keeping each chat's updates in order.
+
+    Updates from the same chat run one after another (so ConversationHandler
+    state stays consistent); updates from different chats run in parallel,
+    up to max_concurrent_updates at a time. Updates waiting on their chat
+    don't occupy a worker slot, so one busy chat cannot starve the others.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = 4096):
+        # The base class semaphore only bounds pending updates; workers are limited below
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        self.worker_limit = max_concurrent_updates
+        self._workers = None
+        self._chats = {}  # chat_id -> [asyncio.Lock, number of queued updates]
+
+    async def initialize(self):
+        self._workers = asyncio.Semaphore(self.worker_limit)
+
+    async def shutdown(self):
+        self._chats.clear()
+
+    async def do_process_update(self, update, coroutine):
+        chat = getattr(update, 'effective_chat', None)
+        if chat is None:
+            async with self._workers:
+                await coroutine
+            return
+
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._workers:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chats[chat.id]
@@ -0,0 +1,46 @@
+import hmac
+import json
+from http import HTTPStatus
+from telegram import Update
+from services.http_server import HttpServer, HttpResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'x-telegram-bot-api-secret-token'
+
+def create_webhook_server(application, url_path: str, secret_token=None):
+    """Build an HttpServer that feeds pushed updates into the application's update queue.
+
+    Besides the webhook path it serves /healthz (process is up) and /readyz
+    (application is running and accepting updates) for load balancers.
+    """
+    server = HttpServer()
+
+    async def receive_update(request):
+        if secret_token is not None:
+            supplied = request.headers.get(SECRET_TOKEN_HEADER, '')
+            if not hmac.compare_digest(supplied.encode(), secret_token.encode()):
+                return HttpResponse(HTTPStatus.FORBIDDEN, 'Forbidden')
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return HttpResponse(HTTPStatus.BAD_REQUEST, 'Invalid JSON')
+        update = Update.de_json(data, application.bot)
+        if update is None:
+            return HttpResponse(HTTPStatus.BAD_REQUEST, 'Invalid update')
+        await application.update_queue.put(update)
+        return HttpResponse(HTTPStatus.OK, 'ok')
+
+    async def health(request):
+        return HttpResponse(HTTPStatus.OK, 'ok')
+
+    async def ready(request):
+        if application.running:
+            return HttpResponse(HTTPStatus.OK, 'ready')
+        return HttpResponse(HTTPStatus.SERVICE_UNAVAILABLE, 'not ready')
+
+    server.add_route('POST', url_path, receive_update)
+    server.add_route('GET', '/healthz', health)
+    server.add_route('GET', '/readyz', ready)
+    return server